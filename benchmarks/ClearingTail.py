@@ -0,0 +1,32 @@
+"""
+How much of the bid list the partial-sort clearing engine sorts and visits, against the batch engine that sorts all of
+it, for growing markets with a fixed number of seats. Run from the repository root:
+
+    python -m benchmarks.ClearingTail
+"""
+import time
+import numpy as np
+
+from src.Clearing import second_price_clearing, second_price_clearing_large
+
+
+def clearing_tail(n_players, n_courses, seats_per_course, rng):
+    bids = rng.random((n_players, n_courses))
+    capacities = np.full(n_courses, seats_per_course)
+    stats = {}
+    start = time.perf_counter()
+    second_price_clearing_large(bids, capacities, rng=rng, stats=stats)
+    large_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    second_price_clearing(bids, capacities, rng=rng)
+    batch_seconds = time.perf_counter() - start
+    return stats, large_seconds, batch_seconds
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    print("%8s %8s %12s %10s %10s %9s %9s" % ('players', 'courses', 'bids', 'sorted', 'visited', 'large s', 'batch s'))
+    for n_players, n_courses in [(1000, 100), (5000, 200), (20000, 500)]:
+        stats, large_seconds, batch_seconds = clearing_tail(n_players, n_courses, 20, rng)
+        print("%8d %8d %12d %10d %10d %9.3f %9.3f" % (n_players, n_courses, stats['bids'], stats['sorted'],
+                                                     stats['visited'], large_seconds, batch_seconds))
@@ -0,0 +1,48 @@
+"""
+What importing a module costs a fresh process (such as a pool worker): wall-clock time, the peak resident memory
+compared to a bare interpreter with numpy, and whether matplotlib or scipy were loaded along. Run from the repository
+root:
+
+    python -m benchmarks.ImportCost
+"""
+from typing import Dict, List
+import json
+import subprocess
+import sys
+
+MODULES = ['src.Auction', 'src.StrategyEvolution', 'src.ParallelEvolution', 'src.FixedAuctions']
+
+_MEASURE = '''
+import json, resource, sys, time
+import numpy
+start = time.perf_counter()
+%s
+seconds = time.perf_counter() - start
+print(json.dumps(dict(seconds=seconds, max_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      heavy=sorted(m for m in ('matplotlib', 'scipy') if m in sys.modules))))
+'''
+
+
+def measure(statement: str) -> Dict:
+    """Runs the import statement in a fresh interpreter, after numpy, which every module of the package needs."""
+    output = subprocess.run([sys.executable, '-c', _MEASURE % statement], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def import_costs(modules: List[str]=MODULES, repeats: int=3) -> Dict[str, Dict]:
+    """Best import time and memory above the bare interpreter of every module."""
+    bare = min(measure('pass')['max_rss_kb'] for _i in range(repeats))
+    results = {}
+    for module in modules:
+        runs = [measure('import ' + module) for _i in range(repeats)]
+        results[module] = dict(seconds=min(run['seconds'] for run in runs),
+                               extra_rss_mb=(min(run['max_rss_kb'] for run in runs) - bare) / 1024,
+                               heavy=runs[0]['heavy'])
+    return results
+
+
+if __name__ == '__main__':
+    print("%-25s %10s %14s  %s" % ('module', 'import ms', 'extra RSS MB', 'loads'))
+    for module, cost in import_costs().items():
+        print("%-25s %10.1f %14.1f  %s" % (module, 1000 * cost['seconds'], cost['extra_rss_mb'],
+                                            ', '.join(cost['heavy']) or '-'))
@@ -0,0 +1,191 @@
+"""
+Benchmark suite for the hot paths: clearing every market size with every clearing function, fitness evaluation
+throughput with and without tied bids, short run_ga runs on each of the fixed auctions, and the cost of importing
+the package in a fresh process. Everything runs offline on synthetic markets with fixed seeds. Run from the repository root:
+
+    python -m benchmarks.Suite [--quick] [--output results.json] [--baseline benchmarks/baseline.json]
+
+Results are written as JSON together with a description of the machine, and compared against the baseline: a
+benchmark more than --tolerance slower than its baseline time is reported as a regression and makes the exit status 1.
+--save-baseline stores the results as the new baseline instead.
+"""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+import src.Auction
+from benchmarks.ImportCost import import_costs
+from src.Clearing import first_price_clearing, first_price_clearing_large, second_price_clearing, \
+    second_price_clearing_large
+from src.EvolutionBudget import EvolutionBudget
+from src.FixedAuctions import fixed_auctions
+from src.Market import Market
+from src.StrategyEvolution import get_population_fitnesses, run_ga
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+REFERENCE_CLEARING_FUNCTIONS = ['first_price_clearing_function', 'second_price_clearing_function',
+                                'vectorized_first_price_clearing_function', 'vectorized_second_price_clearing_function']
+ARRAY_CLEARING_FUNCTIONS = [first_price_clearing, second_price_clearing, first_price_clearing_large,
+                            second_price_clearing_large]
+
+# (players, courses) of the synthetic markets.
+MARKET_SIZES = [(30, 5), (300, 30), (2000, 100)]
+QUICK_MARKET_SIZES = [(30, 5), (300, 30)]
+# Fitness evaluation with tied bids samples every market many times, so it is only run on the smaller markets, and
+# with fewer samples.
+TIED_FITNESS_SIZES = QUICK_MARKET_SIZES
+TIED_FITNESS_SAMPLES = 10
+
+
+def synthetic_market(n_players: int, n_courses: int, seed: int=0) -> Market:
+    """Random utilities, about as many seats as players, and bids that are a random fraction of the utilities."""
+    rng = np.random.default_rng(seed)
+    utilities = rng.random((n_players, n_courses)) * 100
+    capacities = rng.integers(1, max(2, 2 * n_players // n_courses), n_courses)
+    return Market(utilities, capacities, bids=utilities * rng.random((n_players, n_courses)))
+
+
+def timed(run: Callable[[], object], repeats: int) -> float:
+    """Best wall-clock time of repeats calls, the least noisy estimate of the cost of run."""
+    best = float('inf')
+    for _i in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def clearing_benchmarks(sizes: List[Tuple[int, int]], repeats: int) -> Dict[str, Dict]:
+    results = {}
+    for n_players, n_courses in sizes:
+        market = synthetic_market(n_players, n_courses)
+        bid_dicts = [dict(zip(market.courses, row)) for row in market.bids.tolist()]
+        size = '%dx%d' % (n_players, n_courses)
+        for name in REFERENCE_CLEARING_FUNCTIONS:
+            clearing_function = getattr(src.Auction, name)
+            results['clearing/%s/%s' % (name, size)] = dict(
+                seconds=timed(lambda: clearing_function(bid_dicts), repeats))
+        for clearing_function in ARRAY_CLEARING_FUNCTIONS:
+            rng = np.random.default_rng(0)
+            results['clearing/%s/%s' % (clearing_function.__name__, size)] = dict(
+                seconds=timed(lambda: clearing_function(market.bids, market.capacities, rng=rng), repeats))
+    return results
+
+
+def fitness_benchmarks(sizes: List[Tuple[int, int]], population_size: int, repeats: int) -> Dict[str, Dict]:
+    results = {}
+    for n_players, n_courses in sizes:
+        market = synthetic_market(n_players, n_courses)
+        auction = market.to_auction(clearing_function=src.Auction.second_price_clearing_function)
+        population = np.random.default_rng(1).random((population_size, n_courses)) * 100
+        rng = np.random.default_rng(0)
+        seconds = timed(lambda: get_population_fitnesses(auction, 0, population, rng=rng), repeats)
+        results['fitness/%dx%d' % (n_players, n_courses)] = dict(seconds=seconds,
+                                                                  chromosomes_per_second=population_size / seconds)
+        if (n_players, n_courses) in TIED_FITNESS_SIZES:
+            # Bids rounded to tens, so that clearing is random and every individual is sampled repeatedly.
+            tied = Market(market.utilities, market.capacities, bids=np.round(market.bids, -1)).to_auction(
+                clearing_function=src.Auction.second_price_clearing_function)
+            tied_population = np.round(population, -1)
+            seconds = timed(lambda: get_population_fitnesses(tied, 0, tied_population,
+                                                             max_samples=TIED_FITNESS_SAMPLES, rng=rng), repeats)
+            results['fitness_tied/%dx%d' % (n_players, n_courses)] = dict(
+                seconds=seconds, chromosomes_per_second=population_size / seconds)
+    return results
+
+
+def ga_benchmarks(generations: int, repeats: int) -> Dict[str, Dict]:
+    results = {}
+    for scenario, auction in sorted(fixed_auctions.items()):
+        summaries = []
+
+        def run():
+            summaries.append(run_ga(auction=copy.deepcopy(auction), generations=generations, seed=0,
+                                    budget=EvolutionBudget()))
+        seconds = timed(run, repeats)
+        results['run_ga/%s' % scenario] = dict(seconds=seconds, clearings=summaries[-1].clearings)
+    return results
+
+
+def import_benchmarks(repeats: int) -> Dict[str, Dict]:
+    return dict(('import/' + module, cost) for module, cost in import_costs(repeats=repeats).items())
+
+
+def machine_info() -> Dict:
+    return dict(platform=platform.platform(), machine=platform.machine(), processor=platform.processor(),
+                cpu_count=os.cpu_count(), python=platform.python_version(), numpy=np.__version__)
+
+
+def run_suite(quick: bool=False) -> Dict:
+    sizes = QUICK_MARKET_SIZES if quick else MARKET_SIZES
+    repeats = 3 if quick else 5
+    benchmarks = {}
+    benchmarks.update(clearing_benchmarks(sizes, repeats))
+    benchmarks.update(fitness_benchmarks(sizes, 20 if quick else 100, repeats))
+    benchmarks.update(ga_benchmarks(5 if quick else 10, 1 if quick else 3))
+    benchmarks.update(import_benchmarks(1 if quick else 3))
+    return dict(machine=machine_info(), time=time.strftime('%Y-%m-%dT%H:%M:%S'), quick=quick, benchmarks=benchmarks)
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float,
+                min_difference: float=0.002) -> List[Tuple[str, float, float]]:
+    """
+    (name, baseline seconds, seconds) of the benchmarks that got slower than the baseline by more than tolerance, and
+    by more than min_difference seconds, below which timings are mostly noise.
+    """
+    slower = []
+    for name, result in sorted(results['benchmarks'].items()):
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            continue
+        if result['seconds'] > base['seconds'] * (1 + tolerance) and \
+                result['seconds'] - base['seconds'] > min_difference:
+            slower.append((name, base['seconds'], result['seconds']))
+    return slower
+
+
+def main(argv: List[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of clearing, fitness evaluation and run_ga.")
+    parser.add_argument('--quick', action='store_true', help="smaller markets and fewer repeats")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%")
+    parser.add_argument('--min-difference', type=float, default=0.002, help="slowdowns in seconds below this are noise")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick)
+    for name, result in sorted(results['benchmarks'].items()):
+        print("%-70s %10.5fs" % (name, result['seconds']))
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        print("Saved the baseline to " + args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at %s, nothing to compare against." % args.baseline)
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['machine'] != results['machine']:
+        print("Warning: the baseline was recorded on a different machine: %s" % baseline['machine'])
+    slower = regressions(results, baseline, args.tolerance, args.min_difference)
+    for name, base_seconds, seconds in slower:
+        print("REGRESSION %s: %.5fs -> %.5fs (%+.0f%%)" % (name, base_seconds, seconds,
+                                                           100 * (seconds / base_seconds - 1)))
+    if not slower:
+        print("No regressions against " + args.baseline)
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
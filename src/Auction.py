@@ -1,11 +1,14 @@
 from typing import Dict, List, Tuple, Callable
+from collections.abc import Mapping
 import random
 import math
-from scipy.stats import uniform
-
-import matplotlib.pyplot as plt
 import numpy as np
 
+from src.Clearing import UNASSIGNED, all_pay_clearing, first_price_clearing, first_price_clearing_large, \
+    second_price_clearing, second_price_clearing_large, uniform_price_clearing, uniform_price_clearing_large
+from src.Mechanisms import batch_implementation, get_clearing_function, register_mechanism
+from src.RandomStreams import UniformDistribution, sample
+
 #import random
 #from datetime import datetime
 #random.seed(datetime.now())  # So that we have truly random numbers.
@@ -24,6 +27,8 @@ class Auction:
         self.players = players
         if clearing_function is None:
             self.clearing_function = first_price_clearing_function
+        elif isinstance(clearing_function, str):
+            self.clearing_function = get_clearing_function(clearing_function)
         else:
             self.clearing_function = clearing_function
 
@@ -35,22 +40,73 @@ class Auction:
         all_bids = list(map(lambda p: p.strategy(self.courses), self.players))
         return self.clearing_function(all_bids)
 
-    def get_allocative_efficiency(self):
-        all_utilities = list(map(lambda p: p.utilities, self.players))
-        max_utility = 0
-        total_utility = 0
-        for _i in range(1000):
-
-            res = self.run_auction()
-            optimal_res = second_price_clearing_function(all_utilities)
+    def bid_matrix(self) -> np.ndarray:
+        """Players x courses matrix of the current bids, NaN where a player does not bid."""
+        bid_matrix = np.full((len(self.players), len(self.courses)), np.nan)
+        for player_idx in range(len(self.players)):
+            strategy = self.players[player_idx].strategy
+            if isinstance(strategy, ArrayStrategy):
+                bid_matrix[player_idx] = strategy.bids
+                continue
+            bids = strategy(self.courses)
+            for course_idx in range(len(self.courses)):
+                bid_matrix[player_idx, course_idx] = bids.get(self.courses[course_idx], np.nan)
+        return bid_matrix
+
+    def utility_matrix(self) -> np.ndarray:
+        """Players x courses matrix of the utilities of getting each course."""
+        return np.array([self.utility_row(player_idx) for player_idx in range(len(self.players))], dtype=float)
+
+    def utility_row(self, player_idx: int) -> np.ndarray:
+        utilities = self.players[player_idx].utilities
+        if isinstance(utilities, IndexedUtilities) and utilities.courses is self.courses:
+            return utilities.row
+        return np.array([_utility_of(self.players[player_idx], course) for course in self.courses], dtype=float)
+
+    def capacities(self) -> np.ndarray:
+        return np.array([course.capacity for course in self.courses], dtype=np.int64)
+
+    def run_auction_batch(self, candidate_bid_matrix: np.ndarray, player_idx: int) -> np.ndarray:
+        """
+        Clears one auction per row of candidate_bid_matrix (N x courses), where that row replaces the bids of player
+        player_idx and everybody else keeps their current strategy. Returns the N payoffs (utility - payment) of that
+        player.
+        """
+        candidate_bid_matrix = np.asarray(candidate_bid_matrix, dtype=float)
+        utilities = self.utility_row(player_idx)
+        bids = np.repeat(self.bid_matrix()[None, :, :], len(candidate_bid_matrix), axis=0)
+        bids[:, player_idx, :] = candidate_bid_matrix
+        payments, course_idx = self.clear_batch(bids)
+        return _payoffs(utilities, payments[:, player_idx], course_idx[:, player_idx])
+
+    def clear_batch(self, bids: np.ndarray, rng: np.random.Generator = None,
+                    tie_break: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Clears a (..., players, courses) stack of bid matrices with this auction's clearing function.
+        tie_break, random keys broadcast against bids, is only used if the mechanism has a batch implementation.
+        """
+        array_clearing = batch_implementation(self.clearing_function)
+        if array_clearing is not None:
+            return array_clearing(bids, self.capacities(), rng=rng, tie_break=tie_break)
+        # No array implementation known, clear one market at a time through the dict-based function.
+        flat_bids = bids.reshape((-1,) + bids.shape[-2:])
+        payments = np.zeros(flat_bids.shape[:2])
+        course_idx = np.full(flat_bids.shape[:2], UNASSIGNED)
+        for market_idx in range(len(flat_bids)):
+            bid_dicts = [dict((course, bid) for course, bid in zip(self.courses, row) if not np.isnan(bid))
+                         for row in flat_bids[market_idx]]
+            res = self.clearing_function(bid_dicts)
             for i in range(len(res)):
-                _pay, course = res[i]
-                _pay, optimal_course = optimal_res[i]
-                if course is not None:
-                    total_utility += self.players[i].utilities[course]
-                if optimal_course is not None:
-                    max_utility += self.players[i].utilities[optimal_course]
-        return total_utility/1000, max_utility/1000
+                if res[i] is not None and res[i][1] is not None:
+                    payments[market_idx, i], course = res[i]
+                    course_idx[market_idx, i] = self.courses.index(course)
+        return payments.reshape(bids.shape[:-1]), course_idx.reshape(bids.shape[:-1])
+
+    def get_allocative_efficiency(self, samples: int=1000):
+        """Mean realized welfare and the optimal welfare, see src.Efficiency.estimate_efficiency."""
+        from src.Efficiency import estimate_efficiency
+        estimate = estimate_efficiency(self, samples)
+        return estimate.welfare, estimate.benchmark_welfare
 
     def __repr__(self):
         res = self.run_auction()
@@ -64,7 +120,7 @@ class Auction:
             players_repr += "Utilities: " + str(p.utilities.values()) + "\n"
             players_repr += "Bids: " + str(bids.values()) + "\n"
             players_repr += "Gets: " + str(course) + " for " + str(pay) + "\n"
-        return str(self.run_auction()) + "\nPlayers:\n" + players_repr + "\nTotal uitility: " + str(total_utility) + " out of max " + str(max_utility)
+        return str(res) + "\nPlayers:\n" + players_repr + "\nTotal uitility: " + str(total_utility) + " out of max " + str(max_utility)
 
 
 class Course:
@@ -76,6 +132,10 @@ class Course:
             self.popularity_distribution = popularity_distribution
         self.name = name
 
+    def sample_popularity(self, size: int, rng: np.random.Generator = None) -> np.ndarray:
+        """size draws from the popularity distribution, at once if it is a UniformDistribution."""
+        return sample(self.popularity_distribution, size, rng)
+
     def __str__(self):
         return self.name
 
@@ -100,6 +160,39 @@ class InfiniteDict(dict):
         return self.default_item
 
 
+class IndexedUtilities(Mapping):
+    """Read-only Course -> utility mapping backed by a row of a players x courses utility matrix."""
+    __slots__ = ('row', 'courses', 'course_ids')
+
+    def __init__(self, row: np.ndarray, courses: List[Course], course_ids: Dict[Course, int]):
+        self.row = row
+        self.courses = courses
+        self.course_ids = course_ids
+
+    def __getitem__(self, course):
+        if course is None:
+            return 0.0
+        return float(self.row[self.course_ids[course]])
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __len__(self):
+        return len(self.courses)
+
+
+class ArrayStrategy:
+    """Strategy that bids a fixed vector, one bid per course in the order the courses are given."""
+    __slots__ = ('bids',)
+
+    def __init__(self, bids: np.ndarray):
+        self.bids = bids
+
+    def __call__(self, courses: List[Course]) -> Dict[Course, float]:
+        assert(len(courses) == len(self.bids))
+        return dict(zip(courses, self.bids.tolist()))
+
+
 class Player:
     def __init__(self, strategy: Strategy = None, utilities: Dict[Course, float]=None):
         if strategy is None:
@@ -182,121 +275,111 @@ def second_price_clearing_function(bids: List[Dict[Course, float]]) -> List[Tupl
     return assignments
 
 
+def uniform_price_clearing_function(bids: List[Dict[Course, float]]) -> List[Tuple[float, Course]]:
+    """
+    Uniform-price auction: assigned like the first-price auction, but everybody in a full course pays the highest
+    losing bid on it, i.e. the highest bid on it that comes after the last accepted one, whoever made it.
+    Courses that did not fill up are free.
+    """
+    assigned_courses: List[Course] = [None] * len(bids)
+    bids_flattened = []
+    capacities = {}
+    for player_idx in range(len(bids)):
+        for course, bid in bids[player_idx].items():
+            bids_flattened.append((player_idx, course, bid))
+            capacities[course] = course.capacity
+    random.shuffle(bids_flattened)
+    bids_flattened.sort(key=lambda item: item[2], reverse=True)  # Sort on bid, descending.
+
+    payments: Dict[Course, float] = InfiniteDict(None)
+    assigned_players = set()
+    for player, course, bid in bids_flattened:
+        if player not in assigned_players and capacities[course] > 0:
+            assigned_courses[player] = course
+            assigned_players.add(player)
+            capacities[course] -= 1
+        elif capacities[course] == 0 and payments[course] is None:
+            payments[course] = bid
+    return [(payments[course] if payments[course] is not None else 0.0, course) for course in assigned_courses]
+
+
+def all_pay_clearing_function(bids: List[Dict[Course, float]]) -> List[Tuple[float, Course]]:
+    """All-pay auction: assigned like the first-price auction, but every player pays all of their bids."""
+    assignments = first_price_clearing_function(bids)
+    return [(sum(bids[player_idx].values()), assignments[player_idx][1] if assignments[player_idx] else None)
+            for player_idx in range(len(bids))]
+
+
+def _bids_to_matrix(bids: List[Dict[Course, float]]) -> Tuple[np.ndarray, np.ndarray, List[Course]]:
+    """Players x courses bid matrix (NaN where a player does not bid), the capacities and the courses in order."""
+    course_index: Dict[Course, int] = {}
+    for bids_of_player in bids:
+        for course in bids_of_player:
+            if course not in course_index:
+                course_index[course] = len(course_index)
+    courses = list(course_index)
+    bid_matrix = np.full((len(bids), len(courses)), np.nan)
+    for player_idx in range(len(bids)):
+        for course, bid in bids[player_idx].items():
+            bid_matrix[player_idx, course_index[course]] = bid
+    capacities = np.array([course.capacity for course in courses], dtype=np.int64)
+    return bid_matrix, capacities, courses
+
+
+def vectorized_first_price_clearing_function(bids: List[Dict[Course, float]]) -> List[Tuple[float, Course]]:
+    """Same as first_price_clearing_function, computed by the array engine in src.Clearing."""
+    bid_matrix, capacities, courses = _bids_to_matrix(bids)
+    if not courses:
+        return first_price_clearing_function(bids)  # Nobody bids, the engine needs at least one course.
+    payments, course_idx = first_price_clearing(bid_matrix, capacities)
+    return [None if c == UNASSIGNED else (float(pay), courses[c]) for pay, c in zip(payments, course_idx)]
+
+
+def vectorized_second_price_clearing_function(bids: List[Dict[Course, float]]) -> List[Tuple[float, Course]]:
+    """Same as second_price_clearing_function, computed by the array engine in src.Clearing."""
+    bid_matrix, capacities, courses = _bids_to_matrix(bids)
+    if not courses:
+        return second_price_clearing_function(bids)  # Nobody bids, the engine needs at least one course.
+    payments, course_idx = second_price_clearing(bid_matrix, capacities)
+    return [(float(pay), None if c == UNASSIGNED else courses[c]) for pay, c in zip(payments, course_idx)]
+
+
+register_mechanism('first_price', first_price_clearing_function, first_price_clearing, first_price_clearing_large,
+                   alternatives=(vectorized_first_price_clearing_function,))
+register_mechanism('second_price', second_price_clearing_function, second_price_clearing, second_price_clearing_large,
+                   alternatives=(vectorized_second_price_clearing_function,))
+register_mechanism('uniform_price', uniform_price_clearing_function, uniform_price_clearing,
+                   uniform_price_clearing_large)
+register_mechanism('all_pay', all_pay_clearing_function, all_pay_clearing)
+
+
+def _utility_of(player: Player, course: Course) -> float:
+    try:
+        return player.utilities[course]
+    except KeyError:
+        return 0.0
+
+
+def _payoffs(utilities: np.ndarray, payments: np.ndarray, course_idx: np.ndarray) -> np.ndarray:
+    """Utility of the assigned course (0 if unassigned) minus the payment."""
+    gained = np.where(course_idx == UNASSIGNED, 0.0, utilities[np.maximum(course_idx, 0)])
+    return gained - payments
+
+
 def _default_strategy(courses: List[Course]) -> Dict[Course, float]:
     """Bid 0 on everything"""
     return dict(zip(courses, [.0] * len(courses)))
 
 
-def uniform_distribution(range_min, range_max):
-    def dist():
-        return range_min + uniform.rvs() * (range_max - range_min)
-    return dist
-
-
-
-
-    # assign bid to course
-
-
-# # # Plotting functions.
-
-#  This function just initializes a figure with a given number of line plots.
-#  It outputs a list where list[0] is the figure and list[1] is a list with
-#  line plot objects. This is important as update_plot takes this list and
-#  will update the plot data with new data being inputted.
-#  This function initializes the plot with empty data.
-#  It takes as INPUT the number of strategies you want to plot.
-def init_plot_population(number_of_strat):
-    strategy_population = [None] * number_of_strat
-    for i in range(0, number_of_strat):
-        strategy_population[i] = np.array([])
-
-    # Sources for plotting:
-    #       http://www.randalolson.com/2014/06/28/how-to-make
-    #       -beautiful-data-visualizations-in-python-with-matplotlib/
-    # The following are the "Tableau 20" colors as RGB. Check
-    #       https://public.tableau.com/profile/chris.gerrard#!/
-    #       vizhome/TableauColors/ColorPaletteswithRGBValues
-    # to see which color is which.
-    tableau20 = (
-        [(31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120),
-         (44, 160, 44), (152, 223, 138), (214, 39, 40), (255, 152, 150),
-         (148, 103, 189), (197, 176, 213), (140, 86, 75), (196, 156, 148),
-         (227, 119, 194), (247, 182, 210), (127, 127, 127), (199, 199, 199),
-         (188, 189, 34), (219, 219, 141), (23, 190, 207), (158, 218, 229)])
-    # Scale the RGB values to the [0, 1] range, which is the format matplotlib
-    # accepts.
-    for i in range(len(tableau20)):
-        r, g, b = tableau20[i]
-        tableau20[i] = (r / 255., g / 255., b / 255.)
-
-    fig = plt.figure(figsize=(10, 7.5))
-
-    # See
-    #  https://matplotlib.org/gallery/style_sheets/style_sheets_reference.html
-    # for different style types.
-    plt.style.use('seaborn-talk')
-
-    # If LaTeX gives you problems disable these labels.
-   # plt.xlabel(r'Iteration number ($t$)')
-   # plt.ylabel(r'Population fraction $x_i$')
-   # plt.title(r'Evolution of population fraction')
-
-    plot_list = []
-    for i in range(0, number_of_strat):
-        line, = plt.plot(strategy_population[i], color=tableau20[i % 20])
-        plot_list.append(line)
-
-    plt.show()
-    # plt.savefig("graph.png", bbox_inches="tight")
-
-    return fig, plot_list
-
-
-#  What this will do is update the plot with the new data.
-#  New data is expected in the form of a numpy array where
-#       new_data[i]=x_i,
-#  x_i being the population fraction of population i at the current time.
-#  Note: don't input the previous values, just the present population values.
-#  The plot should have been run before with init_plot_population().
-#  plot_output is the output of init_plot_population().
-#  Code inspired by the example from the following link:
-#  https://stackoverflow.com/questions/4098131/
-#  how-to-update-a-plot-in-matplotlib/4098938#4098938
-def update_plot(plot_output, time, new_data):
-    plot_line_list = plot_output[1]
-    nr_strat = len(plot_line_list)
-
-    for strat in range(0, nr_strat):
-        plot_line_list[strat].set_ydata(
-            np.append(plot_line_list[strat].get_ydata(),
-                      new_data[strat]))
-        plot_line_list[strat].set_xdata(
-            np.append(plot_line_list[strat].get_xdata(),
-                      time))  # Increase the time
-    ax = plt.gca()
-    ax.relim()
-    ax.autoscale_view()
-    fig = plot_output[0]
-    fig.canvas.draw()
-    fig.canvas.flush_events()
-
-
-# Now I will test the functions by generating data and plotting it.
-'''
-time = np.arange(0.1, 20, 0.1)
-plot_output = init_plot_population(3)  # plot_output[0] is the figure
-# plot_output[1] is a list of line
-# objects from which to pull the
-# x and y data from
-new_data = [None] * 3
-for t in time:
-    # Generate points to add to the plot:
-    new_data[0] = np.exp(-t)
-    new_data[1] = np.sin(t)
-    new_data[2] = np.log(t)
-
-    # Update the plot:
-    update_plot(plot_output, t, new_data)
-'''
+def uniform_distribution(range_min, range_max) -> UniformDistribution:
+    """Callable drawing from U(range_min, range_max), which can also draw arrays, see src.RandomStreams."""
+    return UniformDistribution(range_min, range_max)
+
 
+def __getattr__(name):
+    # The plotting helpers used to live here. They are imported from src.Plotting only when asked for, so that
+    # importing this module does not load matplotlib.
+    if name in ('init_plot_population', 'update_plot'):
+        import src.Plotting
+        return getattr(src.Plotting, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,74 @@
+"""
+Checkpoints of run_ga, saved as .npz files.
+
+A checkpoint is taken at a generation boundary and holds everything the rest of the run depends on: the players'
+populations and current bids, the market (utilities, capacities, maximum bid and clearing function name), the order
+the players were shuffled into, the states of the random module and of the numpy Generator, the generation counter,
+what the budget has spent and the contents of the fitness cache. Arrays are stored as arrays and the rest as one JSON
+document, so loading needs no pickles. See src.StrategyEvolution.resume_ga.
+"""
+from typing import Dict, NamedTuple
+import json
+import os
+import numpy as np
+
+from src.EvolutionBudget import BudgetSummary
+from src.FitnessCache import FitnessCache
+
+
+class Checkpoint(NamedTuple):
+    generation: int  # The next generation to run.
+    generations: int  # Generations of the whole run.
+    parameters: Dict  # EvolutionParameters as a dict.
+    populations: np.ndarray  # players x population_size x courses, players in their original order.
+    bids: np.ndarray  # players x courses, the current strategies.
+    utilities: np.ndarray  # players x courses.
+    capacities: np.ndarray
+    max_bid: float
+    clearing_function: str  # Name of the clearing function in src.Auction.
+    order: np.ndarray  # The shuffled players: auction.players[i] is the player originally at order[i].
+    random_state: tuple  # random.getstate()
+    rng_state: Dict  # numpy Generator bit_generator.state
+    budget: BudgetSummary
+    cache: FitnessCache = None
+
+
+def save_checkpoint(path: str, checkpoint: Checkpoint):
+    """Writes the checkpoint to path, replacing any previous one only once the new one is complete."""
+    version, mt_state, gauss_next = checkpoint.random_state
+    meta = dict(generation=checkpoint.generation, generations=checkpoint.generations,
+                parameters=checkpoint.parameters, max_bid=checkpoint.max_bid,
+                clearing_function=checkpoint.clearing_function, random_version=version, gauss_next=gauss_next,
+                rng_state=checkpoint.rng_state, budget=checkpoint.budget._asdict(), cache=None)
+    arrays = dict(populations=checkpoint.populations, bids=checkpoint.bids, utilities=checkpoint.utilities,
+                  capacities=checkpoint.capacities, order=checkpoint.order,
+                  random_state=np.array(mt_state, dtype=np.int64))
+    cache = checkpoint.cache
+    if cache is not None:
+        entries = cache.entries()
+        meta['cache'] = dict(max_bytes=cache.max_bytes, hits=cache.hits, misses=cache.misses)
+        arrays['cache_versions'] = np.array([list(key[0]) for key, _fitness in entries], dtype=np.uint8)
+        arrays['cache_chromosomes'] = np.array([np.frombuffer(key[1], dtype=float) for key, _fitness in entries])
+        arrays['cache_fitnesses'] = np.array([fitness for _key, fitness in entries])
+    arrays['meta'] = np.array(json.dumps(meta))
+    partial_path = path + '.partial'
+    with open(partial_path, 'wb') as output:
+        np.savez(output, **arrays)
+    os.replace(partial_path, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    with np.load(path, allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays['meta']))
+        cache = None
+        if meta['cache'] is not None:
+            cache = FitnessCache(meta['cache']['max_bytes'])
+            for version, chromosome, fitness in zip(arrays['cache_versions'], arrays['cache_chromosomes'],
+                                                    arrays['cache_fitnesses']):
+                cache.put((version.tobytes(), np.ascontiguousarray(chromosome).tobytes()), float(fitness))
+            cache.hits, cache.misses = meta['cache']['hits'], meta['cache']['misses']
+        random_state = (meta['random_version'], tuple(int(x) for x in arrays['random_state']), meta['gauss_next'])
+        return Checkpoint(meta['generation'], meta['generations'], meta['parameters'], arrays['populations'],
+                          arrays['bids'], arrays['utilities'], arrays['capacities'], meta['max_bid'],
+                          meta['clearing_function'], arrays['order'], random_state, meta['rng_state'],
+                          BudgetSummary(**meta['budget']), cache)
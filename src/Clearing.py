@@ -0,0 +1,290 @@
+"""
+Array-backed clearing engine.
+
+Bids are given as a players x courses matrix, optionally with leading batch axes, so that many independent markets
+(population members, Monte Carlo samples) can be cleared in one call. A NaN bid means the player does not bid on that
+course. Capacities are a vector with one entry per course.
+
+Results are two arrays indexed like the players: the payment and the index of the assigned course, with UNASSIGNED
+for players that get nothing. Allocations and prices are the same as those of the dict-based clearing functions in
+src.Auction, which serve as the reference implementations. The random tie-breaking keys of the batch engines can be
+passed in as tie_break, broadcast against the bids, to clear several markets with the same random numbers.
+
+The batch engines sort every bid. For a single large market (thousands of players, hundreds of courses) the *_large
+functions sort the bids only as far down as the clearing gets before all seats are taken or all players assigned.
+"""
+from typing import Tuple
+import numpy as np
+
+from src.RandomStreams import get_rng
+
+UNASSIGNED = -1
+
+
+def _as_batch(bids, capacities) -> Tuple[np.ndarray, np.ndarray, tuple]:
+    """Reshape bids to (markets, players, courses) and return the leading shape to restore afterwards."""
+    bids = np.asarray(bids, dtype=float)
+    capacities = np.asarray(capacities)
+    if bids.ndim < 2:
+        raise ValueError("Bids must be at least a players x courses matrix, got shape %s" % (bids.shape,))
+    if capacities.shape != bids.shape[-1:]:
+        raise ValueError("Expected %d capacities, got shape %s" % (bids.shape[-1], capacities.shape))
+    batch_shape = bids.shape[:-2]
+    return bids.reshape((-1,) + bids.shape[-2:]), capacities.astype(np.int64), batch_shape
+
+
+def tie_break_ranks(bids: np.ndarray, rng: np.random.Generator = None, tie_break: np.ndarray = None) -> np.ndarray:
+    """
+    Position of every bid in the clearing order: highest bid first, ties broken by a random key.
+    Missing (NaN) bids are ordered last. The ranks of each market are a permutation of range(players * courses).
+    tie_break may be given to share the random keys between markets (it is broadcast against bids).
+    """
+    n_markets, n_players, n_courses = bids.shape
+    if tie_break is None:
+        tie_break = get_rng(rng).random(bids.shape)
+    keys = np.broadcast_to(tie_break, bids.shape).reshape(n_markets, -1)
+    flat_bids = bids.reshape(n_markets, -1)
+    order = np.lexsort((keys, -flat_bids), axis=-1)  # NaN sorts last.
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(order.shape[1]), order.shape), axis=-1)
+    return ranks.reshape(bids.shape)
+
+
+def greedy_allocation(bids: np.ndarray, capacities: np.ndarray, ranks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Walk the bids in rank order and give each player the first course that still has a seat.
+    Instead of walking one bid at a time, every round accepts all bids that are both the best remaining bid of their
+    player and among the best remaining bids of their course that still fit. Those bids are accepted by the sequential
+    walk too, so the result is identical, and each round accepts at least the best remaining bid.
+    Returns the assigned course index and the rank of the accepted bid (players * courses if unassigned) per player.
+    """
+    n_markets, n_players, n_courses = bids.shape
+    sentinel = n_players * n_courses
+    markets = np.arange(n_markets)[:, None]
+    remaining = np.repeat(capacities[None, :], n_markets, axis=0)
+    active = ~np.isnan(bids) & (remaining > 0)[:, None, :]
+    course_idx = np.full((n_markets, n_players), UNASSIGNED)
+    assigned_rank = np.full((n_markets, n_players), sentinel)
+    # For every course, the players sorted by the rank of their bid on it.
+    column_order = np.argsort(ranks, axis=1)
+    column_ranks = np.take_along_axis(ranks, column_order, axis=1)
+    while True:
+        masked_ranks = np.where(active, ranks, sentinel)
+        best_course = masked_ranks.argmin(axis=2)
+        best_rank = np.take_along_axis(masked_ranks, best_course[:, :, None], axis=2)[:, :, 0]
+        proposing = best_rank < sentinel
+        if not proposing.any():
+            break
+        # The rank of the remaining[c]-th best active bid on each course; nothing worse than that can get a seat.
+        active_count = np.cumsum(np.take_along_axis(active, column_order, axis=1), axis=1)
+        threshold_pos = (active_count < remaining[:, None, :]).sum(axis=1)
+        threshold = np.where(threshold_pos < n_players,
+                             np.take_along_axis(column_ranks, np.minimum(threshold_pos, n_players - 1)[:, None, :],
+                                                axis=1)[:, 0, :],
+                             sentinel)
+        accepted = proposing & (best_rank <= threshold[markets, best_course])
+        course_idx[accepted] = best_course[accepted]
+        assigned_rank[accepted] = best_rank[accepted]
+        accepted_market, _accepted_player = np.nonzero(accepted)
+        np.subtract.at(remaining, (accepted_market, best_course[accepted]), 1)
+        active &= ~accepted[:, :, None]
+        active &= (remaining > 0)[:, None, :]
+    return course_idx, assigned_rank
+
+
+def _restore(batch_shape: tuple, *arrays: np.ndarray) -> Tuple[np.ndarray, ...]:
+    return tuple(a.reshape(batch_shape + a.shape[1:]) for a in arrays)
+
+
+def _batch_keys(tie_break: np.ndarray, batch_shape: tuple, bids: np.ndarray) -> np.ndarray:
+    """tie_break broadcast against the (..., players, courses) bids, in the flattened shape of bids."""
+    if tie_break is None:
+        return None
+    return np.broadcast_to(tie_break, batch_shape + bids.shape[1:]).reshape(bids.shape)
+
+
+def first_price_clearing(bids, capacities, rng: np.random.Generator = None,
+                         tie_break: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """First-price auction: highest overall bid gets assigned a course, pay that price. Returns (payments, courses)."""
+    bids, capacities, batch_shape = _as_batch(bids, capacities)
+    ranks = tie_break_ranks(bids, rng, _batch_keys(tie_break, batch_shape, bids))
+    course_idx, _assigned_rank = greedy_allocation(bids, capacities, ranks)
+    assigned = course_idx != UNASSIGNED
+    winning_bids = np.take_along_axis(bids, np.maximum(course_idx, 0)[:, :, None], axis=2)[:, :, 0]
+    payments = np.where(assigned, winning_bids, 0.0)
+    return _restore(batch_shape, payments, course_idx)
+
+
+def second_price_clearing(bids, capacities, rng: np.random.Generator = None,
+                          tie_break: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign like the first-price auction, but everybody in a course pays the first bid on it that was turned away
+    because the course was full, or 0 if there was none. Returns (payments, courses).
+    """
+    bids, capacities, batch_shape = _as_batch(bids, capacities)
+    ranks = tie_break_ranks(bids, rng, _batch_keys(tie_break, batch_shape, bids))
+    course_idx, payments = _second_price_allocation(bids, capacities, ranks)
+    return _restore(batch_shape, payments, course_idx)
+
+
+def uniform_price_clearing(bids, capacities, rng: np.random.Generator = None,
+                           tie_break: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign like the first-price auction, but everybody in a full course pays the highest losing bid on it: the
+    highest bid on it, by anybody, that was reached after it filled up. Courses that did not fill up are free.
+    Returns (payments, courses).
+    """
+    bids, capacities, batch_shape = _as_batch(bids, capacities)
+    ranks = tie_break_ranks(bids, rng, _batch_keys(tie_break, batch_shape, bids))
+    course_idx, assigned_rank = greedy_allocation(bids, capacities, ranks)
+    fill_rank = _fill_ranks(course_idx, assigned_rank, capacities, bids.shape[1] * bids.shape[2])
+    losing_bids = np.where(~np.isnan(bids) & (ranks > fill_rank[:, None, :]), bids, -np.inf).max(axis=1)
+    course_price = np.where(losing_bids > -np.inf, losing_bids, 0.0)
+    assigned = course_idx != UNASSIGNED
+    payments = np.where(assigned, np.take_along_axis(course_price, np.maximum(course_idx, 0), axis=1), 0.0)
+    return _restore(batch_shape, payments, course_idx)
+
+
+def all_pay_clearing(bids, capacities, rng: np.random.Generator = None,
+                     tie_break: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Assign like the first-price auction, but every player pays all of their bids, won or not."""
+    _payments, course_idx = first_price_clearing(bids, capacities, rng, tie_break)
+    return np.nansum(np.asarray(bids, dtype=float), axis=-1), course_idx
+
+
+def _fill_ranks(course_idx: np.ndarray, assigned_rank: np.ndarray, capacities: np.ndarray,
+                sentinel: int) -> np.ndarray:
+    """The rank at which each course became full: -1 if it never had seats, sentinel if it never filled up."""
+    n_markets = course_idx.shape[0]
+    n_courses = capacities.shape[0]
+    assigned = course_idx != UNASSIGNED
+    seats_taken = np.zeros((n_markets, n_courses), dtype=np.int64)
+    fill_rank = np.full((n_markets, n_courses), -1)
+    assigned_market, _assigned_player = np.nonzero(assigned)
+    assigned_course = course_idx[assigned]
+    np.add.at(seats_taken, (assigned_market, assigned_course), 1)
+    np.maximum.at(fill_rank, (assigned_market, assigned_course), assigned_rank[assigned])
+    return np.where(seats_taken < capacities[None, :], sentinel, fill_rank)
+
+
+def _second_price_allocation(bids: np.ndarray, capacities: np.ndarray,
+                             ranks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    n_markets, n_players, n_courses = bids.shape
+    sentinel = n_players * n_courses
+    course_idx, assigned_rank = greedy_allocation(bids, capacities, ranks)
+    assigned = course_idx != UNASSIGNED
+    fill_rank = _fill_ranks(course_idx, assigned_rank, capacities, sentinel)
+    # A bid sets the price if its player was still unassigned and its course was already full when it was reached.
+    setting_price = ~np.isnan(bids) & (ranks > fill_rank[:, None, :]) & (ranks < assigned_rank[:, :, None])
+    price_ranks = np.where(setting_price, ranks, sentinel)
+    price_setter = price_ranks.argmin(axis=1)
+    has_price = np.take_along_axis(price_ranks, price_setter[:, None, :], axis=1)[:, 0, :] < sentinel
+    course_price = np.where(has_price, np.take_along_axis(bids, price_setter[:, None, :], axis=1)[:, 0, :], 0.0)
+    payments = np.where(assigned, np.take_along_axis(course_price, np.maximum(course_idx, 0), axis=1), 0.0)
+    return course_idx, payments
+
+
+def first_price_clearing_large(bids, capacities, rng: np.random.Generator = None,
+                               stats: dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    """first_price_clearing for one big market, see _partial_sort_clearing."""
+    return _partial_sort_clearing(bids, capacities, 'first', rng, stats)
+
+
+def second_price_clearing_large(bids, capacities, rng: np.random.Generator = None,
+                                stats: dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    """second_price_clearing for one big market, see _partial_sort_clearing."""
+    return _partial_sort_clearing(bids, capacities, 'second', rng, stats)
+
+
+def uniform_price_clearing_large(bids, capacities, rng: np.random.Generator = None,
+                                 stats: dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    """uniform_price_clearing for one big market, see _partial_sort_clearing."""
+    return _partial_sort_clearing(bids, capacities, 'uniform', rng, stats)
+
+
+def _partial_sort_clearing(bids, capacities, pricing: str, rng: np.random.Generator = None,
+                           stats: dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Walks the bids from the highest like the reference clearing functions, but only sorts as much of them as the walk
+    reaches. The bids are cut into chunks of doubling size with a linear-time partition, and the walk stops as soon as
+    no later bid can change the outcome: when every player is assigned or every seat is taken, and, with 'second' or
+    'uniform' pricing, every full course that can still get a price has one. In a big market this leaves most of the
+    bid tail unsorted and unvisited. If stats is given, the number of bids sorted and visited are added to it.
+    """
+    bids, capacities, batch_shape = _as_batch(bids, capacities)
+    if batch_shape:
+        raise ValueError("Expected the bids of one market, got shape %s" % (batch_shape + bids.shape[-2:],))
+    bids = bids[0]
+    n_players, n_courses = bids.shape
+    flat_bids = bids.ravel()
+    tie_break = get_rng(rng).random(flat_bids.shape)
+    remaining = np.flatnonzero(~np.isnan(flat_bids))
+
+    # The walk visits bids one at a time, so its state is kept in Python lists rather than indexed numpy arrays.
+    player_course = [UNASSIGNED] * n_players
+    player_payment = [0.0] * n_players
+    seats = capacities.tolist()
+    has_price = [seat_count <= 0 for seat_count in seats]  # Nobody pays the price of a course without seats.
+    course_price = [0.0] * n_courses
+    priced = pricing != 'first'
+    uniform = pricing == 'uniform'
+    unassigned_players = n_players
+    free_seats = int(capacities.sum())
+    courses_without_price = 0  # Full courses whose price is not known yet.
+    sorted_count = visited_count = 0
+    chunk_size = max(1024, 2 * min(n_players, free_seats))
+
+    def finished():
+        if pricing == 'second':
+            # Only unassigned players set prices.
+            return unassigned_players == 0 or (free_seats == 0 and courses_without_price == 0)
+        return (unassigned_players == 0 or free_seats == 0) and courses_without_price == 0
+
+    while remaining.size and not finished():
+        if remaining.size > chunk_size:
+            # Everything at least as high as the chunk_size-th highest bid, so that ties are never cut apart.
+            threshold = np.partition(flat_bids[remaining], remaining.size - chunk_size)[remaining.size - chunk_size]
+            in_chunk = flat_bids[remaining] >= threshold
+            chunk, remaining = remaining[in_chunk], remaining[~in_chunk]
+        else:
+            chunk, remaining = remaining, remaining[:0]
+        chunk = chunk[np.lexsort((tie_break[chunk], -flat_bids[chunk]))]
+        sorted_count += chunk.size
+        for entry, bid in zip(chunk.tolist(), flat_bids[chunk].tolist()):
+            visited_count += 1
+            player, course = divmod(entry, n_courses)
+            if player_course[player] != UNASSIGNED:
+                # Bids of assigned players only matter as the uniform price of a full course.
+                if not uniform or seats[course] > 0 or has_price[course]:
+                    continue
+                course_price[course] = bid
+                has_price[course] = True
+                courses_without_price -= 1
+            elif seats[course] > 0:
+                player_course[player] = course
+                player_payment[player] = bid
+                seats[course] -= 1
+                unassigned_players -= 1
+                free_seats -= 1
+                if priced and seats[course] == 0:
+                    courses_without_price += 1
+            elif priced and not has_price[course]:
+                course_price[course] = bid
+                has_price[course] = True
+                courses_without_price -= 1
+            else:
+                continue
+            # Only reached when the state changed.
+            if finished():
+                break
+        chunk_size *= 2
+
+    if stats is not None:
+        stats['sorted'] = stats.get('sorted', 0) + sorted_count
+        stats['visited'] = stats.get('visited', 0) + visited_count
+        stats['bids'] = stats.get('bids', 0) + flat_bids.size
+    course_idx = np.array(player_course, dtype=np.int64)
+    if priced:
+        prices = np.array(course_price)  # 0 where no price was set.
+        return np.where(course_idx == UNASSIGNED, 0.0, prices[np.maximum(course_idx, 0)]), course_idx
+    return np.array(player_payment), course_idx
@@ -0,0 +1,80 @@
+"""
+Allocative efficiency: the welfare (sum of the utilities of the assigned courses) the auction realizes with the
+current strategies, compared to a benchmark allocation.
+
+The benchmark is the exact welfare-maximizing allocation from src.OptimalAllocation. The truthful greedy allocation
+that get_allocative_efficiency used to compare against (clearing the auction with every player bidding their
+utilities) is still available; it is not optimal once courses have more than one seat. Clearing is random only through
+tie-breaking, so markets without ties are cleared once and random ones are sampled in vectorized batches.
+"""
+from statistics import NormalDist
+from typing import NamedTuple, Tuple
+import numpy as np
+
+from src.Auction import Auction
+from src.Clearing import UNASSIGNED, first_price_clearing
+from src.FitnessEstimation import has_ties
+from src.OptimalAllocation import optimal_welfare
+
+_MAX_BATCH_ENTRIES = 2**22  # Bids cleared per vectorized batch, bounds the memory of a batch.
+
+
+class EfficiencyEstimate(NamedTuple):
+    welfare: float  # Mean realized welfare.
+    confidence_interval: Tuple[float, float]  # Of the mean realized welfare.
+    benchmark_welfare: float
+    welfare_ratio: float  # welfare / benchmark_welfare, nan if the benchmark is 0.
+    samples: int  # Clearings of the realized auction, 1 if it is deterministic.
+
+
+def welfare(utilities: np.ndarray, course_idx: np.ndarray) -> np.ndarray:
+    """Sum of the utilities of the assigned courses, for (..., players) course assignments."""
+    gained = np.take_along_axis(np.broadcast_to(utilities, course_idx.shape + utilities.shape[-1:]),
+                                np.maximum(course_idx, 0)[..., None], axis=-1)[..., 0]
+    return np.where(course_idx == UNASSIGNED, 0.0, gained).sum(axis=-1)
+
+
+def sample_welfare(bids: np.ndarray, utilities: np.ndarray, clear, samples: int,
+                   rng: np.random.Generator = None) -> np.ndarray:
+    """Welfare of samples independent clearings of one market (just one if its bids have no ties)."""
+    if not has_ties(bids):
+        samples = 1
+    batch_size = max(1, _MAX_BATCH_ENTRIES // bids.size)
+    welfares = []
+    while samples > 0:
+        n_draws = min(batch_size, samples)
+        _payments, course_idx = clear(np.broadcast_to(bids, (n_draws,) + bids.shape), rng)
+        welfares.append(welfare(utilities, course_idx))
+        samples -= n_draws
+    return np.concatenate(welfares)
+
+
+def greedy_benchmark_welfare(utilities: np.ndarray, capacities: np.ndarray, samples: int=1000,
+                             rng: np.random.Generator = None) -> float:
+    """Expected welfare of clearing the market with everybody bidding their utilities."""
+    def clear(bids, rng):
+        return first_price_clearing(bids, capacities, rng=rng)
+    return float(sample_welfare(utilities, utilities, clear, samples, rng).mean())
+
+
+def estimate_efficiency(auction: Auction, samples: int=1000, confidence: float=0.95, rng: np.random.Generator = None,
+                        benchmark: str='optimal') -> EfficiencyEstimate:
+    """Realized welfare against the 'optimal' or the truthful 'greedy' benchmark."""
+    utilities = auction.utility_matrix()
+    if benchmark == 'optimal':
+        benchmark_welfare = optimal_welfare(utilities, auction.capacities())
+    elif benchmark == 'greedy':
+        benchmark_welfare = greedy_benchmark_welfare(utilities, auction.capacities(), samples, rng)
+    else:
+        raise ValueError("Unknown benchmark: " + str(benchmark))
+
+    def clear(bids, rng):
+        return auction.clear_batch(bids, rng=rng)
+    welfares = sample_welfare(auction.bid_matrix(), utilities, clear, samples, rng)
+    mean = float(welfares.mean())
+    if len(welfares) > 1:
+        half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * welfares.std(ddof=1) / np.sqrt(len(welfares))
+    else:
+        half_width = 0.0
+    ratio = mean / benchmark_welfare if benchmark_welfare != 0 else float('nan')
+    return EfficiencyEstimate(mean, (mean - half_width, mean + half_width), benchmark_welfare, ratio, len(welfares))
@@ -0,0 +1,85 @@
+"""
+Budgets for run_ga: how many inner iterations each player's population runs per generation, and caps on the total
+number of fitness evaluations and on wall-clock time. A budget keeps the count of what a run has spent and ends with
+a summary of it.
+"""
+from typing import Callable, NamedTuple
+import time
+
+Schedule = Callable[[int], int]  # Generation number -> inner iterations per player in that generation.
+
+
+def fixed_schedule(iterations: int=1) -> Schedule:
+    return lambda _generation: iterations
+
+
+def linear_schedule(slope: float=1.0, intercept: float=0.0) -> Schedule:
+    """slope * generation + intercept iterations. linear_schedule(1) is how run_ga used to grow quadratically."""
+    return lambda generation: int(intercept + slope * generation)
+
+
+class BudgetSummary(NamedTuple):
+    generations: int  # Generations completed.
+    iterations: int  # Inner iterations run, summed over players.
+    evaluations: int  # Individuals whose fitness was evaluated.
+    clearings: int  # Auctions cleared to evaluate them.
+    seconds: float
+    stop_reason: str  # 'generations', 'evaluations' or 'seconds'.
+
+
+class EvolutionBudget:
+    def __init__(self, schedule: Schedule=None, max_evaluations: int=None, max_seconds: float=None):
+        if schedule is None:
+            schedule = fixed_schedule(1)
+        self.schedule = schedule
+        self.max_evaluations = max_evaluations
+        self.max_seconds = max_seconds
+        self.generations = 0
+        self.iterations = 0
+        self.evaluations = 0
+        self.clearings = 0
+        self._start = None
+        self._stopped = None  # The reason the run stopped on, see exhausted.
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def resume(self, spent: BudgetSummary):
+        """Starts the budget as if it had already spent what the summary of an interrupted run says."""
+        self.generations, self.iterations, self.evaluations, self.clearings = spent[:4]
+        self._start = time.perf_counter() - spent.seconds
+
+    def elapsed(self) -> float:
+        if self._start is None:
+            return 0.0
+        return time.perf_counter() - self._start
+
+    def iterations_in(self, generation: int) -> int:
+        return max(0, int(self.schedule(generation)))
+
+    def spend(self, evaluations: int, clearings: int, iterations: int=1):
+        self.iterations += iterations
+        self.evaluations += evaluations
+        self.clearings += clearings
+
+    def end_generation(self):
+        self.generations += 1
+
+    def stop_reason(self) -> str:
+        """Why the run has to stop now, or None if there is budget left."""
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return 'evaluations'
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return 'seconds'
+        return None
+
+    def exhausted(self) -> bool:
+        """Whether the run has to stop now. Runs stop when this is True, so the reason is kept for the summary."""
+        reason = self.stop_reason()
+        if reason is not None and self._stopped is None:
+            self._stopped = reason
+        return reason is not None
+
+    def summary(self) -> BudgetSummary:
+        return BudgetSummary(self.generations, self.iterations, self.evaluations, self.clearings, self.elapsed(),
+                             self._stopped or 'generations')
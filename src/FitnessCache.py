@@ -0,0 +1,96 @@
+"""
+Memoization of fitness estimates.
+
+A player's fitness landscape only changes when the opponents' bids change, so estimates are keyed on the chromosome
+bytes together with a version stamp of the opponent profile: a digest of the player's utilities and of the opponents'
+bid rows. The rows are sorted before hashing, so reordering the players (run_ga shuffles them every generation) keeps
+the stamp. Entries are evicted least recently used first once the cache grows past its memory cap.
+"""
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+import hashlib
+import numpy as np
+
+_ENTRY_OVERHEAD = 200  # Rough bytes per entry besides the chromosome: key tuple, digest, float and dict slot.
+
+
+class FitnessCache:
+    def __init__(self, max_bytes: int=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def entries(self) -> List[Tuple[Tuple[bytes, bytes], float]]:
+        """(key, fitness) pairs, least recently used first."""
+        return list(self._entries.items())
+
+    def get(self, key):
+        fitness = self._entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return fitness
+
+    def put(self, key, fitness: float):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            self.bytes += len(key[1]) + _ENTRY_OVERHEAD
+        self._entries[key] = fitness
+        while self.bytes > self.max_bytes and self._entries:
+            evicted_key, _fitness = self._entries.popitem(last=False)
+            self.bytes -= len(evicted_key[1]) + _ENTRY_OVERHEAD
+
+    def evaluate(self, profile_version: bytes, population: np.ndarray,
+                 estimate: Callable[[np.ndarray], Tuple[np.ndarray, int]]) -> Tuple[np.ndarray, int, int]:
+        """
+        Fitness of every row of population, calling estimate(rows) -> (fitnesses, clearings) only for the distinct
+        rows that are not cached. Returns the fitnesses, the number of rows estimated and the clearings spent.
+        """
+        population = np.ascontiguousarray(population, dtype=float)
+        fitnesses = np.empty(len(population))
+        missing = {}  # Chromosome bytes -> indices of the rows with that chromosome.
+        for i in range(len(population)):
+            key = (profile_version, population[i].tobytes())
+            if key[1] in missing:
+                missing[key[1]].append(i)
+                self.hits += 1  # A duplicate in the same population, estimated once.
+                continue
+            fitness = self.get(key)
+            if fitness is None:
+                missing[key[1]] = [i]
+            else:
+                fitnesses[i] = fitness
+        if not missing:
+            return fitnesses, 0, 0
+        first_rows = [rows[0] for rows in missing.values()]
+        estimated, clearings = estimate(population[first_rows])
+        for chromosome, rows, fitness in zip(missing, missing.values(), estimated):
+            fitnesses[rows] = fitness
+            self.put((profile_version, chromosome), float(fitness))
+        return fitnesses, len(first_rows), clearings
+
+
+def profile_version(bid_matrix: np.ndarray, utilities: np.ndarray, player_idx: int) -> bytes:
+    """Version stamp of what player player_idx plays against: its own utilities and the others' bids, in any order."""
+    opponents = np.delete(bid_matrix, player_idx, axis=0)
+    opponents = opponents[np.lexsort(opponents.T[::-1])] if len(opponents) else opponents
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(utilities, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(opponents, dtype=float).tobytes())
+    return digest.digest()
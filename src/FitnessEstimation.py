@@ -0,0 +1,177 @@
+"""
+Monte Carlo estimation of the fitness (utility - payment) of candidate bid vectors.
+
+Clearing is random only through tie-breaking, so every sample is an independent clearing of the same market.
+Samples are drawn in vectorized batches, and an individual stops being sampled as soon as the standard error of its
+mean payoff falls below the tolerance. Markets without tied bids are deterministic and are cleared only once.
+
+race_fitnesses clears the markets of all individuals with common random numbers, the same tie-breaking keys in every
+sample, and stops sampling individuals as soon as their place in the ranking is settled. Selection only needs the
+ranking, and under common random numbers the differences between similar individuals, as the members of an evolving
+population are, vary much less than the payoffs themselves, so the ranking is settled with fewer clearings.
+"""
+from typing import List, NamedTuple
+import numpy as np
+
+from src.Auction import Auction, _payoffs
+from src.RandomStreams import get_rng
+from src.Telemetry import Telemetry
+
+_MAX_BATCH_ENTRIES = 2**22  # Bids cleared per vectorized batch, bounds the memory of a batch.
+
+
+class FitnessEstimate(NamedTuple):
+    mean: np.ndarray
+    variance: np.ndarray  # Sample variance of the payoff, 0 where only one sample was drawn.
+    samples: np.ndarray  # Number of clearings used for each individual.
+
+
+def has_ties(bids: np.ndarray) -> np.ndarray:
+    """Whether each (..., players, courses) market contains two equal bids, i.e. whether clearing it is random."""
+    flat_bids = np.sort(bids.reshape(bids.shape[:-2] + (-1,)), axis=-1)
+    return np.any(flat_bids[..., 1:] == flat_bids[..., :-1], axis=-1)
+
+
+def estimate_fitnesses(auction: Auction, player_idx: int, population: List[List[float]], max_samples: int=100,
+                       min_samples: int=5, tolerance: float=0.01, batch_size: int=25,
+                       rng: np.random.Generator = None, telemetry: Telemetry = None) -> FitnessEstimate:
+    """
+    Estimates the expected payoff of every chromosome in population when played by player player_idx against the
+    current strategies of the other players. Each individual gets at least min_samples (if its market is random) and
+    at most max_samples clearings. The time spent clearing is added to the telemetry's 'clearing' stage.
+    """
+    population = np.asarray(population, dtype=float)
+    n_individuals = len(population)
+    utilities = auction.utility_row(player_idx)
+    markets = _markets(auction, player_idx, population)
+
+    totals = np.zeros(n_individuals)
+    squared_totals = np.zeros(n_individuals)
+    samples = np.zeros(n_individuals, dtype=np.int64)
+    active = has_ties(markets)
+
+    # Deterministic markets, and the first sample of every random one.
+    payoffs = _sample_payoffs(auction, player_idx, utilities, markets, 1, rng, telemetry)[0]
+    totals += payoffs
+    squared_totals += payoffs ** 2
+    samples += 1
+
+    while np.any(active) and samples.max(initial=0) < max_samples:
+        active_idx = np.nonzero(active)[0]
+        n_draws = min(batch_size, max_samples - int(samples[active_idx].max()),
+                      _draws_per_batch(markets[active_idx]))
+        payoffs = _sample_payoffs(auction, player_idx, utilities, markets[active_idx], n_draws, rng, telemetry)
+        totals[active_idx] += payoffs.sum(axis=0)
+        squared_totals[active_idx] += (payoffs ** 2).sum(axis=0)
+        samples[active_idx] += n_draws
+
+        variance = _sample_variance(totals[active_idx], squared_totals[active_idx], samples[active_idx])
+        standard_error = np.sqrt(variance / samples[active_idx])
+        converged = (samples[active_idx] >= min_samples) & (standard_error <= tolerance)
+        active[active_idx[converged | (samples[active_idx] >= max_samples)]] = False
+
+    return FitnessEstimate(totals / samples, _sample_variance(totals, squared_totals, samples), samples)
+
+
+def race_fitnesses(auction: Auction, player_idx: int, population: List[List[float]], max_samples: int=100,
+                   min_samples: int=5, tolerance: float=0.01, batch_size: int=25, confidence: float=3.0,
+                   rng: np.random.Generator = None, telemetry: Telemetry = None) -> FitnessEstimate:
+    """
+    Estimates the same expected payoffs as estimate_fitnesses, from samples shared by all individuals with random
+    markets. After min_samples, an individual drops out of the race once its order against every other individual
+    still racing is settled: their paired difference is more than confidence standard errors away from 0, or its
+    standard error is already as small as that of max_samples independent samples (or below the tolerance). Clearly
+    worse or better individuals drop out early, near-equal ones race on. As in estimate_fitnesses, an individual also
+    stops when the standard error of its own mean is below the tolerance, which is the only way for the leader (the
+    individual with the highest mean) to stop before max_samples.
+    """
+    population = np.asarray(population, dtype=float)
+    utilities = auction.utility_row(player_idx)
+    markets = _markets(auction, player_idx, population)
+    market_shape = markets.shape[1:]
+
+    # Deterministic markets, and the first sample of every random one.
+    payoffs = _sample_payoffs(auction, player_idx, utilities, markets, 1, rng, telemetry,
+                              get_rng(rng).random(market_shape))[0]
+    totals = payoffs.copy()
+    squared_totals = payoffs ** 2
+    samples = np.ones(len(population), dtype=np.int64)
+    # Individuals still racing, which have all been cleared with the same keys, and the sums of products of their
+    # payoffs, from which the variance of the difference between any two of them follows.
+    racing = np.nonzero(has_ties(markets))[0]
+    cross_totals = np.outer(payoffs[racing], payoffs[racing])
+
+    while len(racing) > 0 and samples[racing[0]] < max_samples:
+        n_samples = int(samples[racing[0]])
+        n_draws = min(batch_size, max_samples - n_samples, _draws_per_batch(markets[racing]))
+        keys = get_rng(rng).random((n_draws, 1) + market_shape)
+        payoffs = _sample_payoffs(auction, player_idx, utilities, markets[racing], n_draws, rng, telemetry, keys)
+        totals[racing] += payoffs.sum(axis=0)
+        squared_totals[racing] += (payoffs ** 2).sum(axis=0)
+        cross_totals += payoffs.T @ payoffs
+        samples[racing] += n_draws
+        n_samples += n_draws
+        if n_samples < min_samples:
+            continue
+
+        # Standard errors of the differences between every pair of racing individuals, from the paired samples.
+        difference_totals = totals[racing][:, None] - totals[racing][None, :]
+        squared_differences = squared_totals[racing][:, None] + squared_totals[racing][None, :] - 2 * cross_totals
+        standard_error = np.sqrt(_sample_variance(difference_totals, squared_differences, n_samples) / n_samples)
+        variance = _sample_variance(totals[racing], squared_totals[racing], n_samples)
+        # What estimate_fitnesses would know about the difference after max_samples independent samples of each.
+        independent_error = np.sqrt((variance[:, None] + variance[None, :]) / max_samples)
+        ordered = (np.abs(difference_totals) / n_samples > confidence * standard_error) | \
+            (standard_error <= np.maximum(tolerance, independent_error))
+        precise = np.sqrt(variance / n_samples) <= tolerance
+        done = ordered.all(axis=1) | precise
+        leader = int(np.argmax(totals[racing]))
+        done[leader] = precise[leader]
+        racing = racing[~done]
+        cross_totals = cross_totals[np.ix_(~done, ~done)]
+
+    return FitnessEstimate(totals / samples, _sample_variance(totals, squared_totals, samples), samples)
+
+
+def _markets(auction: Auction, player_idx: int, population: np.ndarray) -> np.ndarray:
+    """The bid matrix of the auction once for every individual, with the individual as the bids of player_idx."""
+    markets = np.repeat(auction.bid_matrix()[None, :, :], len(population), axis=0)
+    markets[:, player_idx, :] = population
+    return markets
+
+
+def _draws_per_batch(markets: np.ndarray) -> int:
+    """Clearings of every market that fit in one batch, at least one."""
+    return max(1, _MAX_BATCH_ENTRIES // max(1, markets.size))
+
+
+def _sample_payoffs(auction: Auction, player_idx: int, utilities: np.ndarray, markets: np.ndarray, n_draws: int,
+                    rng: np.random.Generator = None, telemetry: Telemetry = None,
+                    tie_break: np.ndarray = None) -> np.ndarray:
+    """
+    The payoffs (n_draws x markets) of player_idx in n_draws clearings of each of the markets. If one clearing of
+    every market is more than a batch, the markets are cleared a few at a time.
+    """
+    chunk = max(1, _MAX_BATCH_ENTRIES // max(1, n_draws * markets[0].size)) if len(markets) > 0 else 1
+    payoffs = np.empty((n_draws, len(markets)))
+    for start in range(0, len(markets), chunk):
+        part = markets[start:start + chunk]
+        payments, course_idx = _clear(auction, np.broadcast_to(part, (n_draws,) + part.shape), rng, telemetry,
+                                      tie_break)
+        payoffs[:, start:start + chunk] = _payoffs(utilities, payments[:, :, player_idx], course_idx[:, :, player_idx])
+    return payoffs
+
+
+def _clear(auction: Auction, markets: np.ndarray, rng: np.random.Generator = None, telemetry: Telemetry = None,
+           tie_break: np.ndarray = None):
+    if telemetry is None:
+        return auction.clear_batch(markets, rng=rng, tie_break=tie_break)
+    with telemetry.timing('clearing'):
+        return auction.clear_batch(markets, rng=rng, tie_break=tie_break)
+
+
+def _sample_variance(totals: np.ndarray, squared_totals: np.ndarray, samples: np.ndarray) -> np.ndarray:
+    mean = totals / samples
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squared_totals - samples * mean ** 2) / (samples - 1)
+    return np.where(samples > 1, np.maximum(variance, 0.0), 0.0)
@@ -0,0 +1,128 @@
+"""
+Island-model execution mode of run_ga.
+
+Every player evolves several sub-populations (islands) instead of one. An island runs an epoch of
+migration_interval generations in a worker process, against the opponents' strategies as they were when the epoch
+started, and then sends copies of its best individuals to the islands the topology connects it to. Islands are
+resubmitted as soon as their epoch is done, taking in whatever migrants have arrived (they replace the island's least
+fit individuals), so there is no barrier between islands or between players: a slow island only delays itself.
+A player's strategy is the best individual of whichever of its islands reported the highest fitness last.
+
+Because islands proceed at their own pace, the outcome depends on the timing of the workers and is not reproducible
+from the seed alone, unlike src.ParallelEvolution.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, List, Tuple
+import numpy as np
+
+from src.Auction import Auction
+from src.EvolutionBudget import BudgetSummary, EvolutionBudget
+from src.ParallelEvolution import EvolutionTask, task_auction
+from src.RandomStreams import child_seed
+from src.StrategyEvolution import EvolutionParameters, decode_chromosome, evaluate_population, evolve_population, \
+    random_population
+
+Topology = Callable[[int, int], List[int]]  # (island, number of islands) -> islands it sends migrants to.
+
+
+def ring_topology(island: int, n_islands: int) -> List[int]:
+    return [(island + 1) % n_islands] if n_islands > 1 else []
+
+
+def complete_topology(island: int, n_islands: int) -> List[int]:
+    return [other for other in range(n_islands) if other != island]
+
+
+def run_islands(auction: Auction, generations, population_size: int, parameters: EvolutionParameters,
+                islands: int=4, migration_interval: int=5, migrants: int=2, topology: Topology=ring_topology,
+                start_range: float=1, workers: int=None, seed: int=None,
+                budget: EvolutionBudget = None) -> BudgetSummary:
+    """
+    Evolves islands populations of population_size individuals per player for generations generations each.
+    The budget's evaluation and time caps are checked whenever an island finishes an epoch; its schedule is not used.
+    Afterwards every player's population attribute holds its islands stacked on top of each other.
+    """
+    if budget is None:
+        budget = EvolutionBudget()
+        budget.start()
+    generations = int(generations)
+    root_seed = np.random.SeedSequence(seed)
+    init_rng = np.random.default_rng(root_seed.spawn(1)[0])
+    n_players = len(auction.players)
+    populations = [[random_population(population_size, len(auction.courses), start_range, auction.max_bid, init_rng)
+                    for _i in range(islands)] for _p in range(n_players)]
+    fitnesses = [[None] * islands for _p in range(n_players)]
+    best = [[(-np.inf, None)] * islands for _p in range(n_players)]  # (fitness, individual) of the last epoch.
+    mailboxes = [[{} for _i in range(islands)] for _p in range(n_players)]  # Sending island -> its migrants.
+    progress = np.zeros((n_players, islands), dtype=np.int64)  # Generations done by each island.
+    utilities = auction.utility_matrix()
+    capacities = auction.capacities()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+
+        def submit(player_idx: int, island: int):
+            population = populations[player_idx][island]
+            incoming = mailboxes[player_idx][island]
+            if incoming:
+                receive_migrants(population, fitnesses[player_idx][island], np.concatenate(list(incoming.values())))
+                incoming.clear()
+            epoch = int(progress[player_idx, island]) // migration_interval
+            task = EvolutionTask(player_idx, population, auction.bid_matrix(), utilities[player_idx], capacities,
+                                 auction.clearing_function,
+                                 min(migration_interval, generations - int(progress[player_idx, island])),
+                                 parameters, child_seed(root_seed, player_idx, island, epoch))
+            running[pool.submit(evolve_island, task)] = (player_idx, island, task.iterations)
+
+        for player_idx in range(n_players):
+            for island in range(islands):
+                if generations > 0 and not budget.exhausted():
+                    submit(player_idx, island)
+        while running:
+            done, _pending = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                player_idx, island, iterations = running.pop(future)
+                population, island_fitnesses, spent = future.result()
+                budget.spend(spent.evaluations, spent.clearings, spent.iterations)
+                populations[player_idx][island] = population
+                fitnesses[player_idx][island] = island_fitnesses
+                fittest = np.argsort(-island_fitnesses, kind='stable')
+                best[player_idx][island] = (float(island_fitnesses[fittest[0]]), population[fittest[0]].copy())
+                auction.players[player_idx].strategy = decode_chromosome(max(best[player_idx],
+                                                                             key=lambda pair: pair[0])[1])
+                for destination in topology(island, islands):
+                    mailboxes[player_idx][destination][island] = population[fittest[:migrants]].copy()
+                progress[player_idx, island] += iterations
+                while budget.generations < progress.min():
+                    budget.end_generation()
+                if progress[player_idx, island] < generations and not budget.exhausted():
+                    submit(player_idx, island)
+    for player_idx in range(n_players):
+        auction.players[player_idx].population = np.concatenate(populations[player_idx])
+    return budget.summary()
+
+
+def receive_migrants(population: np.ndarray, fitnesses: np.ndarray, migrants: np.ndarray):
+    """Replaces the least fit individuals of population, in place, by the migrants."""
+    n_migrants = min(len(migrants), len(population))
+    if fitnesses is None:
+        least_fit = np.arange(len(population) - n_migrants, len(population))
+    else:
+        least_fit = np.argsort(fitnesses, kind='stable')[:n_migrants]
+    population[least_fit] = migrants[:n_migrants]
+
+
+def evolve_island(task: EvolutionTask) -> Tuple[np.ndarray, np.ndarray, BudgetSummary]:
+    """
+    Worker entry point. Returns the evolved population, the fitnesses of its individuals against the opponents of the
+    task and what was spent.
+    """
+    rng = np.random.default_rng(task.seed)
+    auction = task_auction(task)
+    population = task.population.copy()
+    spent = EvolutionBudget()
+    evolve_population(auction, task.player_idx, population, task.iterations, task.parameters, rng, spent)
+    island_fitnesses, evaluations, clearings = evaluate_population(auction, task.player_idx, population,
+                                                                   task.parameters, rng)
+    spent.spend(evaluations, clearings, iterations=0)
+    return population, island_fitnesses, spent.summary()
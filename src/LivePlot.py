@@ -0,0 +1,185 @@
+"""
+Live plots of run_ga telemetry that never hold up the GA.
+
+LivePlot is a telemetry hook (see src.Telemetry) that turns each generation record into a few numbers and hands them
+to a plotting process through a bounded queue, without waiting: if the plotting process falls behind, points are
+dropped rather than the GA slowed down. The plotting process keeps the points in preallocated buffers that decimate
+themselves when full, so memory and drawing cost stay bounded however long the run, and redraws at most once per
+interval with everything that arrived in the meantime. Given a path, it renders to a PNG or SVG file there instead of
+a window, which is what to use on machines without a display. plot_records draws a finished run, e.g. one read back
+from a JsonLinesLogger file, the same way.
+"""
+from typing import Callable, Dict, Iterable, List, Tuple
+import multiprocessing
+import queue
+import time
+import numpy as np
+
+Series = Callable[[Dict], Dict[str, float]]  # Telemetry record -> the value of every plotted series.
+
+
+def best_fitnesses(record: Dict) -> Dict[str, float]:
+    """The best fitness of every player, the default series."""
+    return dict(('player %d' % player['player'], player['best']) for player in record['players'])
+
+
+def generation_seconds(record: Dict) -> Dict[str, float]:
+    return dict(seconds=record['seconds'])
+
+
+class PlotBuffer:
+    """
+    Preallocated storage for the points of a set of series over time. Once capacity points are stored, every other
+    one is dropped and from then on only every stride-th new point is kept, with the stride doubling each time, so a
+    run of any length is shown by between capacity / 2 and capacity points spread evenly over it.
+    """
+    def __init__(self, names: List[str], capacity: int=2000):
+        self.names = list(names)
+        self.capacity = capacity - capacity % 2
+        self.x = np.empty(self.capacity)
+        self.y = np.empty((len(self.names), self.capacity))
+        self.size = 0
+        self.stride = 1
+        self._seen = 0  # Points appended since the last one kept.
+
+    def append(self, x: float, values: Dict[str, float]):
+        self._seen += 1
+        if self._seen < self.stride:
+            return
+        self._seen = 0
+        if self.size == self.capacity:
+            self.x[:self.size // 2] = self.x[0:self.size:2]
+            self.y[:, :self.size // 2] = self.y[:, 0:self.size:2]
+            self.size //= 2
+            self.stride *= 2
+        self.x[self.size] = x
+        self.y[:, self.size] = [values.get(name, np.nan) for name in self.names]
+        self.size += 1
+
+    def data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Views of the stored x values and of the series x points matrix."""
+        return self.x[:self.size], self.y[:, :self.size]
+
+
+class LivePlot:
+    """
+    Telemetry hook plotting series(record) against the generation number in a separate process. Renders to path
+    (.png or .svg) if one is given, to a window otherwise, at most every interval seconds.
+    """
+    def __init__(self, path: str=None, series: Series=best_fitnesses, interval: float=1.0, capacity: int=2000,
+                 queue_size: int=1000):
+        self.series = series
+        self.dropped = 0  # Records that did not fit in the queue.
+        context = multiprocessing.get_context('spawn')
+        self._queue = context.Queue(queue_size)
+        self._process = context.Process(target=_plot_process, args=(self._queue, path, interval, capacity),
+                                        daemon=True)
+        self._process.start()
+
+    def __call__(self, record: Dict):
+        try:
+            self._queue.put_nowait((record['generation'], self.series(record)))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float=30):
+        """
+        Waits up to timeout seconds for the last points to be drawn, then stops the plotting process if it has not
+        finished, so that a plotting process that died or hangs cannot hold up the run.
+        """
+        deadline = time.perf_counter() + timeout
+        if self._process.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._process.join(max(0.0, deadline - time.perf_counter()))
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        if self._process.exitcode != 0:
+            self._queue.cancel_join_thread()  # Nothing reads the points left in the queue.
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+
+def plot_records(records: Iterable[Dict], path: str, series: Series=best_fitnesses, capacity: int=2000):
+    """Draws series of every record of a run to path (.png or .svg), without a display."""
+    plot = _Plot(capacity, interactive=False)
+    for record in records:
+        plot.add(record['generation'], series(record))
+    plot.draw(path)
+
+
+class _Plot:
+    def __init__(self, capacity: int, interactive: bool=True):
+        self.capacity = capacity
+        self.buffer = None
+        if interactive:
+            import matplotlib.pyplot as plt
+            self.plt = plt
+            self.figure, self.axes = plt.subplots(figsize=(10, 7.5))
+        else:
+            # A figure on its own Agg canvas, which leaves pyplot and the backend of the process alone.
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            self.plt = None
+            self.figure = Figure(figsize=(10, 7.5))
+            FigureCanvasAgg(self.figure)
+            self.axes = self.figure.add_subplot()
+        self.axes.set_xlabel('Generation')
+        self.lines = []
+
+    def add(self, x: float, values: Dict[str, float]):
+        if self.buffer is None:
+            # The series are those of the first point.
+            self.buffer = PlotBuffer(sorted(values), self.capacity)
+            self.lines = [self.axes.plot([], [], label=name)[0] for name in self.buffer.names]
+            if len(self.lines) <= 20:
+                self.axes.legend(loc='upper left')
+        self.buffer.append(x, values)
+
+    def draw(self, path: str=None):
+        if self.buffer is not None:
+            x, y = self.buffer.data()
+            for line, values in zip(self.lines, y):
+                line.set_data(x, values)
+            self.axes.relim()
+            self.axes.autoscale_view()
+        if path is not None:
+            self.figure.savefig(path, bbox_inches='tight')
+        else:
+            self.figure.canvas.draw_idle()
+            self.plt.pause(0.001)
+
+
+def _plot_process(points: multiprocessing.Queue, path: str, interval: float, capacity: int):
+    plot = _Plot(capacity, interactive=path is None)
+    if path is None:
+        plot.plt.show(block=False)
+    last_draw = 0.0
+    pending = False
+    while True:
+        try:
+            point = points.get(timeout=interval)
+        except queue.Empty:
+            point = ()
+        # Take everything that is waiting, to draw it all at once.
+        while point != ():
+            if point is None:
+                plot.draw(path)
+                return
+            plot.add(*point)
+            pending = True
+            try:
+                point = points.get_nowait()
+            except queue.Empty:
+                point = ()
+        if pending and time.perf_counter() - last_draw >= interval:
+            plot.draw(path)
+            last_draw = time.perf_counter()
+            pending = False
@@ -1,19 +1,20 @@
 from src.StrategyEvolution import run_ga
 import cProfile
 from src.FixedAuctions import *
-import copy
+from src.Sweep import run_sweep, sweep_grid
 
 def profile():
     cProfile.run('res = run_ga(generations=100)')
 
 
-auction = fixed_auctions['realistic1']
-print(auction)
-_total, max_utility = auction.get_allocative_efficiency()
-auction_history = []
-for max_bid in [math.inf, 200, 100, 50, 25, 10, 1, 0.01, 0.0000001]:
-    auction.max_bid = max_bid
-    run_ga(auction=auction, generations=20, start_range=auction.max_bid)
-    print("%f&\t%f\\\\" % (max_bid, auction.get_allocative_efficiency()[0]))
-    auction_history.append(copy.deepcopy(auction))
-pass
+if __name__ == '__main__':
+    auction = fixed_auctions['realistic1']
+    print(auction)
+    points = sweep_grid(scenarios=['realistic1'], max_bids=[math.inf, 200, 100, 50, 25, 10, 1, 0.01, 0.0000001],
+                        ga_parameters=[dict(generations=20)])
+    results = {}
+    for record in run_sweep(points, 'sweep_results.jsonl'):
+        results[record['max_bid']] = record
+        print("finished max_bid=%f in %.1fs" % (record['max_bid'], record['seconds']))
+    for max_bid in sorted(results, reverse=True):
+        print("%f&\t%f\\\\" % (max_bid, results[max_bid]['total_utility']))
@@ -0,0 +1,54 @@
+"""
+Indexed representation of an auction: courses get dense integer ids and the utilities and bids of all players live in
+two contiguous players x courses matrices. Players built from a Market hold views into those matrices, so the
+existing Auction, Player and Course APIs keep working on top of it.
+"""
+from typing import Dict, List
+import numpy as np
+
+from src.Auction import Auction, ArrayStrategy, Course, IndexedUtilities, Player
+
+
+class Market:
+    __slots__ = ('courses', 'capacities', 'utilities', 'bids')
+
+    def __init__(self, utilities: np.ndarray, capacities: np.ndarray, courses: List[Course]=None,
+                 bids: np.ndarray=None):
+        self.utilities = np.ascontiguousarray(utilities, dtype=float)
+        self.capacities = np.asarray(capacities, dtype=np.int64)
+        n_players, n_courses = self.utilities.shape
+        if self.capacities.shape != (n_courses,):
+            raise ValueError("Expected %d capacities, got shape %s" % (n_courses, self.capacities.shape))
+        if courses is None:
+            courses = [Course(capacity=int(capacity), name="Course " + str(i))
+                       for i, capacity in enumerate(self.capacities)]
+        self.courses = courses
+        if bids is None:
+            bids = np.zeros((n_players, n_courses))
+        self.bids = np.ascontiguousarray(bids, dtype=float)
+
+    @property
+    def n_players(self) -> int:
+        return self.utilities.shape[0]
+
+    @property
+    def n_courses(self) -> int:
+        return self.utilities.shape[1]
+
+    def course_ids(self) -> Dict[Course, int]:
+        return dict((course, i) for i, course in enumerate(self.courses))
+
+    def players(self) -> List[Player]:
+        """One Player per row, whose utilities and strategy are views into the matrices of this market."""
+        course_ids = self.course_ids()
+        return [Player(strategy=ArrayStrategy(self.bids[i]),
+                       utilities=IndexedUtilities(self.utilities[i], self.courses, course_ids))
+                for i in range(self.n_players)]
+
+    def to_auction(self, max_bid: float=100, clearing_function=None) -> Auction:
+        return Auction(max_bid=max_bid, players=self.players(), courses=self.courses,
+                       clearing_function=clearing_function)
+
+    @staticmethod
+    def from_auction(auction: Auction) -> 'Market':
+        return Market(auction.utility_matrix(), auction.capacities(), auction.courses, auction.bid_matrix())
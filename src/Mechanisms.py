@@ -0,0 +1,122 @@
+"""
+Registry of clearing mechanisms.
+
+A mechanism is specified by its reference clearing function, which takes the bids as a list of Course -> bid dicts and
+returns the (payment, course) of every player like the functions in src.Auction. Next to it, it can declare faster
+implementations of the same rule: alternatives with the same interface, a batch implementation on bid arrays in the
+style of src.Clearing (used by Auction.clear_batch, and so by fitness estimation), and a single-market implementation
+for large markets. check_conformance clears random markets with every implementation and reports where they differ
+from the reference, which is what a new implementation has to pass before it is registered.
+
+The built-in mechanisms are registered by src.Auction.
+"""
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+import random
+import numpy as np
+
+from src.Clearing import UNASSIGNED
+
+ReferenceClearing = Callable[[List[Dict]], List[Tuple]]  # List of Course -> bid dicts -> (payment, course) per player.
+ArrayClearing = Callable[..., Tuple[np.ndarray, np.ndarray]]  # (bids, capacities, rng=None) -> (payments, courses).
+
+
+class Mechanism(NamedTuple):
+    name: str
+    reference: ReferenceClearing
+    batch: ArrayClearing = None  # Clears (..., players, courses) bid arrays, with tie_break support.
+    large: ArrayClearing = None  # Clears one players x courses market.
+    alternatives: Tuple[ReferenceClearing, ...] = ()  # Other implementations with the reference's interface.
+
+
+_mechanisms: Dict[str, Mechanism] = {}
+_by_function: Dict[ReferenceClearing, Mechanism] = {}
+_by_function_name: Dict[str, ReferenceClearing] = {}
+
+
+def register_mechanism(name: str, reference: ReferenceClearing, batch: ArrayClearing = None,
+                       large: ArrayClearing = None, alternatives: Tuple[ReferenceClearing, ...] = ()) -> Mechanism:
+    if name in _mechanisms:
+        raise ValueError("A mechanism named %s is already registered" % name)
+    mechanism = Mechanism(name, reference, batch, large, tuple(alternatives))
+    _mechanisms[name] = mechanism
+    for function in (reference,) + mechanism.alternatives:
+        _by_function[function] = mechanism
+        _by_function_name[function.__name__] = function
+    return mechanism
+
+
+def get_mechanism(mechanism: Union[str, ReferenceClearing]) -> Mechanism:
+    """
+    The mechanism with the given name, or the one that a clearing function, or a clearing function with the given
+    name, implements.
+    """
+    if isinstance(mechanism, str):
+        if mechanism in _mechanisms:
+            return _mechanisms[mechanism]
+        return _by_function[get_clearing_function(mechanism)]
+    return _by_function[mechanism]
+
+
+def get_clearing_function(name: str) -> ReferenceClearing:
+    """The reference of the mechanism with the given name, or the registered clearing function of that name."""
+    if name in _mechanisms:
+        return _mechanisms[name].reference
+    if name not in _by_function_name:
+        raise KeyError("Unknown mechanism or clearing function: %s, registered mechanisms are %s"
+                       % (name, sorted(_mechanisms)))
+    return _by_function_name[name]
+
+
+def mechanisms() -> List[Mechanism]:
+    return list(_mechanisms.values())
+
+
+def batch_implementation(clearing_function: ReferenceClearing) -> ArrayClearing:
+    """The batch implementation of the mechanism of clearing_function, None if there is none."""
+    mechanism = _by_function.get(clearing_function)
+    return mechanism.batch if mechanism is not None else None
+
+
+# Conformance harness.
+
+def random_market(rng: random.Random, max_players: int=12, max_courses: int=5, max_capacity: int=3,
+                  missing_bids: float=0.2) -> Tuple[List, List[Dict]]:
+    """Courses and bid dicts with distinct bids, so that every mechanism clears them deterministically."""
+    from src.Auction import Course
+    courses = [Course(capacity=rng.randint(0, max_capacity)) for _i in range(rng.randint(1, max_courses))]
+    bids = [dict((course, rng.random() * 100) for course in courses if rng.random() >= missing_bids)
+            for _p in range(rng.randint(1, max_players))]
+    return courses, bids
+
+
+def reference_arrays(assignments: List[Tuple], courses: List) -> Tuple[np.ndarray, np.ndarray]:
+    """(payments, course indices) of the output of a reference clearing function."""
+    payments = np.zeros(len(assignments))
+    course_idx = np.full(len(assignments), UNASSIGNED)
+    for i, assignment in enumerate(assignments):
+        if assignment is not None:
+            payments[i] = assignment[0]
+            if assignment[1] is not None:
+                course_idx[i] = courses.index(assignment[1])
+    return payments, course_idx
+
+
+def check_conformance(mechanism: Mechanism, markets: int=200, seed: int=0) -> List[str]:
+    """Descriptions of the random markets on which an implementation of the mechanism differs from its reference."""
+    rng = random.Random(seed)
+    failures = []
+    for market in range(markets):
+        courses, bids = random_market(rng)
+        expected = reference_arrays(mechanism.reference(bids), courses)
+        bid_matrix = np.array([[bids_of_player.get(course, np.nan) for course in courses] for bids_of_player in bids])
+        capacities = np.array([course.capacity for course in courses])
+        results = [(function.__name__, reference_arrays(function(bids), courses))
+                   for function in mechanism.alternatives]
+        for function in (mechanism.batch, mechanism.large):
+            if function is not None:
+                results.append((function.__name__, function(bid_matrix, capacities)))
+        for name, (payments, course_idx) in results:
+            if not (np.array_equal(course_idx, expected[1]) and np.allclose(payments, expected[0])):
+                failures.append("%s differs from %s on market %d: %s" % (name, mechanism.reference.__name__, market,
+                                                                         bid_matrix.tolist()))
+    return failures
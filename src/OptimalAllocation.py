@@ -0,0 +1,116 @@
+"""
+Exact welfare-maximizing allocation: every player gets at most one course, every course at most its capacity, and the
+sum of the utilities of the assigned courses is as large as possible. Players with no positive utility stay unassigned.
+
+This is a min-cost flow on the player x seat graph. It is solved by successive shortest paths, inserting one player at a
+time, on a graph condensed to the courses: moving from course c to course d means moving the member of c that loses
+the least by switching to d. A player without a course is a member of an extra course that never fills up. Each
+insertion finds the cheapest chain of such moves that ends in a course with a free seat, with Dijkstra on reduced costs,
+so the allocation is optimal for the players inserted so far after every step. The graph has courses + 1 nodes
+whatever the number of players, which is what makes this fast for many players and few courses.
+"""
+import numpy as np
+
+from src.Clearing import UNASSIGNED
+
+
+def optimal_allocation(utilities: np.ndarray, capacities: np.ndarray) -> np.ndarray:
+    """The course index of every player in a welfare-maximizing allocation, UNASSIGNED for players without one."""
+    utilities = np.asarray(utilities, dtype=float)
+    n_players, n_courses = utilities.shape
+    unassigned = n_courses  # The course of the players without one.
+    sink = n_courses + 1
+    gains = np.concatenate([utilities, np.zeros((n_players, 1))], axis=1)
+    remaining = np.asarray(capacities, dtype=np.int64).copy()
+    members = [[] for _c in range(n_courses + 1)]
+    # move_cost[c, d]: the cheapest switch of a member of c to d, made by player mover[c, d].
+    move_cost = np.full((n_courses + 1, n_courses + 1), np.inf)
+    mover = np.full((n_courses + 1, n_courses + 1), -1)
+    potential = np.zeros(n_courses + 2)
+    course_potential = potential[:-1]
+    course_idx = np.full(n_players, UNASSIGNED)
+    nodes = np.arange(n_courses + 1)
+
+    def refresh(c):
+        if not members[c]:
+            move_cost[c] = np.inf
+            return
+        m = np.array(members[c])
+        costs = gains[m, c][:, None] - gains[m]
+        best = costs.argmin(axis=0)
+        move_cost[c] = costs[best, nodes]
+        mover[c] = m[best]
+        move_cost[c, c] = np.inf
+
+    def join_unassigned(q):
+        # The unassigned can be many, so their row is updated incrementally when one joins.
+        members[unassigned].append(q)
+        better = -gains[q] < move_cost[unassigned]
+        better[unassigned] = False
+        move_cost[unassigned][better] = -gains[q][better]
+        mover[unassigned][better] = q
+
+    for p in np.argsort(-utilities.max(axis=1, initial=0.0), kind='stable'):
+        # Dijkstra from p over the courses, on costs reduced by the potentials so that they are non-negative.
+        key = np.empty(n_courses + 2)
+        key[:-1] = np.max(gains[p] + course_potential) - gains[p] - course_potential
+        key[sink] = np.inf
+        course_key = key[:-1]
+        parent = np.full(n_courses + 2, -1)
+        course_parent = parent[:-1]
+        closed = np.zeros(n_courses + 1)  # inf once a course has been popped.
+        popped = []
+        while True:
+            v = int(key.argmin())
+            dv = key[v]
+            if v == sink or dv == np.inf:
+                break
+            popped.append((v, dv))
+            key[v] = np.inf
+            closed[v] = np.inf
+            dv_potential = dv + potential[v]
+            if v == unassigned or remaining[v] > 0:
+                if dv_potential - potential[sink] < key[sink]:
+                    key[sink] = dv_potential - potential[sink]
+                    parent[sink] = v
+            candidates = move_cost[v] + (dv_potential - course_potential) + closed
+            better = candidates < course_key
+            np.copyto(course_key, candidates, where=better)
+            np.copyto(course_parent, v, where=better)
+        sink_distance = key[sink]
+        potential += sink_distance
+        for v, dv in popped:
+            potential[v] += dv - sink_distance
+
+        path = []
+        v = parent[sink]
+        while v != -1:
+            path.append(v)
+            v = parent[v]
+        path.reverse()
+        moves = [(mover[c, d], c, d) for c, d in zip(path[:-1], path[1:])]
+        moves.append((p, None, path[0]))
+        left_unassigned = False
+        for q, c, d in moves:
+            if c is not None:
+                members[c].remove(q)
+                left_unassigned |= c == unassigned
+            if d == unassigned:
+                join_unassigned(q)
+                course_idx[q] = UNASSIGNED
+            else:
+                members[d].append(q)
+                course_idx[q] = d
+        if path[-1] != unassigned:
+            remaining[path[-1]] -= 1
+        for c in set(path):
+            if c != unassigned or left_unassigned:
+                refresh(c)
+    return course_idx
+
+
+def optimal_welfare(utilities: np.ndarray, capacities: np.ndarray) -> float:
+    utilities = np.asarray(utilities, dtype=float)
+    course_idx = optimal_allocation(utilities, capacities)
+    assigned = course_idx != UNASSIGNED
+    return float(utilities[assigned, course_idx[assigned]].sum())
@@ -0,0 +1,98 @@
+"""
+Parallel execution mode of run_ga.
+
+Within a generation every player's population is evolved by a worker process against a snapshot of the opponents'
+best strategies at the start of the generation, and the new best strategies are merged back in at the generation
+boundary. Workers get the opponent state as compact arrays (bid matrix, utility row, capacities) instead of a pickled
+Auction, and every (generation, player) update is seeded from its own SeedSequence, so the result depends only on the
+seed and not on the number of workers or the order in which workers finish.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+import numpy as np
+
+from src.Auction import Auction, Course
+from src.Market import Market
+from src.EvolutionBudget import BudgetSummary, EvolutionBudget
+from src.Telemetry import Telemetry
+from src.RandomStreams import child_seed
+from src.StrategyEvolution import EvolutionParameters, decode_chromosome, evolve_population, random_population
+
+
+class EvolutionTask(NamedTuple):
+    player_idx: int
+    population: np.ndarray  # population_size x courses.
+    bids: np.ndarray  # Players x courses, the opponents' current bids.
+    utilities: np.ndarray  # Utility of each course for the evolving player.
+    capacities: np.ndarray
+    clearing_function: object  # A module-level clearing function, pickled by reference.
+    iterations: int
+    parameters: EvolutionParameters
+    seed: np.random.SeedSequence
+
+
+def run_ga_parallel(auction: Auction, generations, population_size: int, parameters: EvolutionParameters,
+                    start_range: float=1, workers: int=None, seed: int=None,
+                    budget: EvolutionBudget = None, telemetry: Telemetry = None) -> BudgetSummary:
+    """
+    Like run_ga, but with each player's population update of a generation done by a pool of worker processes.
+    The budget is checked at generation boundaries only, and the telemetry only gets what the generations spent.
+    """
+    if budget is None:
+        budget = EvolutionBudget()
+        budget.start()
+    root_seed = np.random.SeedSequence(seed)
+    init_rng = np.random.default_rng(root_seed.spawn(1)[0])
+    n_players = len(auction.players)
+    populations = [random_population(population_size, len(auction.courses), start_range, auction.max_bid, init_rng)
+                   for _p in range(n_players)]
+    for i in range(n_players):
+        auction.players[i].population = populations[i]
+    utilities = auction.utility_matrix()
+    capacities = auction.capacities()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i_generation in range(int(generations)):
+            if budget.exhausted():
+                break
+            if telemetry is not None:
+                telemetry.begin_generation(i_generation, auction.players, budget)
+            iterations = budget.iterations_in(i_generation)
+            bids = auction.bid_matrix()
+            tasks = [EvolutionTask(player_idx, populations[player_idx], bids,
+                                   utilities[player_idx], capacities, auction.clearing_function, iterations,
+                                   parameters, child_seed(root_seed, i_generation, player_idx))
+                     for player_idx in range(n_players)]
+            for player_idx, population, best_individual, spent in pool.map(evolve_task, tasks):
+                populations[player_idx][:] = population
+                if best_individual is not None:
+                    auction.players[player_idx].strategy = decode_chromosome(best_individual)
+                budget.spend(spent.evaluations, spent.clearings, spent.iterations)
+            budget.end_generation()
+            if telemetry is not None:
+                telemetry.end_generation(budget)
+    return budget.summary()
+
+
+def evolve_task(task: EvolutionTask):
+    """
+    Worker entry point. Returns the player index, the evolved population, its best individual (None if no iterations
+    were run) and what was spent.
+    """
+    rng = np.random.default_rng(task.seed)
+    auction = task_auction(task)
+    population = task.population.copy()
+    spent = EvolutionBudget()
+    evolve_population(auction, task.player_idx, population, task.iterations, task.parameters, rng, spent)
+    best_individual = None
+    if spent.iterations > 0:
+        best_individual = auction.players[task.player_idx].strategy.bids
+    return task.player_idx, population, best_individual, spent.summary()
+
+
+def task_auction(task: EvolutionTask) -> Auction:
+    """The auction the task's player plays in, as far as the player can tell: only its own utilities are known."""
+    utilities = np.zeros_like(task.bids)
+    utilities[task.player_idx] = task.utilities
+    courses = [Course(capacity=int(capacity)) for capacity in task.capacities]
+    return Market(utilities, task.capacities, courses, task.bids).to_auction(task.parameters.max_bid,
+                                                                            task.clearing_function)
@@ -0,0 +1,63 @@
+"""
+Random number streams of the package, all numpy Generators.
+
+There is one shared Generator for code that is not handed one, which seed() makes reproducible. Runs that need
+independent streams, one per worker or per (generation, player) task, derive them from a root SeedSequence with
+child_seed, so that every stream depends only on the root seed and its key. Distributions are drawn in bulk: a course
+popularity distribution made by uniform_distribution is a UniformDistribution that samples whole arrays at once, and
+sample() also accepts any other popularity callable, drawing from it one value at a time.
+"""
+from typing import Callable, Union
+import numpy as np
+
+_shared_rng = np.random.default_rng()
+
+Distribution = Callable[[], float]
+
+
+def seed(seed: int=None):
+    """Reseeds the shared Generator."""
+    global _shared_rng
+    _shared_rng = np.random.default_rng(seed)
+
+
+def get_rng(rng: np.random.Generator = None) -> np.random.Generator:
+    """rng, or the shared Generator if it is None."""
+    if rng is None:
+        return _shared_rng
+    return rng
+
+
+def child_seed(root: np.random.SeedSequence, *key: int) -> np.random.SeedSequence:
+    """The seed of the stream with the given key under root, e.g. child_seed(root, generation, player)."""
+    return np.random.SeedSequence(root.entropy, spawn_key=tuple(root.spawn_key) + key)
+
+
+def child_rng(root: np.random.SeedSequence, *key: int) -> np.random.Generator:
+    return np.random.default_rng(child_seed(root, *key))
+
+
+class UniformDistribution:
+    """Uniform on [low, high). Called, it draws one value from the shared Generator like the old closures did."""
+    __slots__ = ('low', 'high')
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def __call__(self) -> float:
+        return float(self.sample(None))
+
+    def sample(self, size=None, rng: np.random.Generator = None) -> Union[float, np.ndarray]:
+        return get_rng(rng).uniform(self.low, self.high, size)
+
+    def __repr__(self):
+        return "UniformDistribution(%r, %r)" % (self.low, self.high)
+
+
+def sample(distribution: Distribution, size: int, rng: np.random.Generator = None) -> np.ndarray:
+    """size draws from distribution, in bulk if it supports that, else one call at a time."""
+    bulk = getattr(distribution, 'sample', None)
+    if bulk is not None:
+        return np.asarray(bulk(size, rng), dtype=float)
+    return np.fromiter((distribution() for _i in range(size)), dtype=float, count=size)
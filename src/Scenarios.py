@@ -0,0 +1,119 @@
+"""
+Synthetic markets at production scale (10^3 to 10^5 players, up to 10^3 courses) and an on-disk format for markets.
+
+Utilities follow a one-factor model: every course has a quality that all players see, and every player adds an
+independent taste per course. popularity_correlation is the share of the variance the players agree on, so 0 makes
+tastes independent and 1 ranks the courses the same for everybody. The sum is squashed to (0, utility_scale).
+Seats are spread over the courses evenly, or at random with a Dirichlet concentration for uneven course sizes.
+
+A saved market is a directory of .npy files, one per array, and a JSON file with the spec it was generated from.
+load_market maps the arrays from disk with np.load(mmap_mode=...), so they are not copied or even read until used, and
+builds the Auction on them through src.Market, without any per-player dicts. generate_scenario writes the utility
+matrix in chunks of rows, so a market does not have to fit in memory to be generated.
+"""
+from typing import NamedTuple
+import json
+import os
+import numpy as np
+
+from src.Auction import Auction
+from src.Market import Market
+from src.RandomStreams import child_rng
+
+_CHUNK_ROWS = 4096  # Players generated per random stream; fixed, so that a spec always gives the same market.
+
+
+class ScenarioSpec(NamedTuple):
+    n_players: int
+    n_courses: int
+    seats_per_player: float = 1.0  # Total capacity over the number of players.
+    capacity_concentration: float = None  # Dirichlet concentration of the course sizes, None for equal sizes.
+    popularity_correlation: float = 0.5
+    utility_scale: float = 100.0
+    seed: int = 0
+
+
+def generate_capacities(spec: ScenarioSpec) -> np.ndarray:
+    total = int(round(spec.seats_per_player * spec.n_players))
+    if spec.capacity_concentration is None:
+        capacities = np.full(spec.n_courses, total // spec.n_courses, dtype=np.int64)
+        capacities[:total % spec.n_courses] += 1
+        return capacities
+    rng = child_rng(np.random.SeedSequence(spec.seed), 0)
+    shares = rng.dirichlet(np.full(spec.n_courses, float(spec.capacity_concentration)))
+    return rng.multinomial(total, shares).astype(np.int64)
+
+
+def generate_utilities(spec: ScenarioSpec, out: np.ndarray=None) -> np.ndarray:
+    """The players x courses utility matrix, written into out (e.g. a memory map) if it is given."""
+    if out is None:
+        out = np.empty((spec.n_players, spec.n_courses))
+    root = np.random.SeedSequence(spec.seed)
+    quality = np.sqrt(spec.popularity_correlation) * child_rng(root, 1).standard_normal(spec.n_courses)
+    taste_weight = np.sqrt(1 - spec.popularity_correlation)
+    for chunk, start in enumerate(range(0, spec.n_players, _CHUNK_ROWS)):
+        rows = out[start:start + _CHUNK_ROWS]
+        child_rng(root, 2, chunk).standard_normal(rows.shape, out=rows)
+        rows *= taste_weight
+        rows += quality
+        # A logistic squash, close to the normal CDF, to (0, utility_scale).
+        rows *= -1.702
+        np.exp(rows, out=rows)
+        rows += 1
+        np.divide(spec.utility_scale, rows, out=rows)
+    return out
+
+
+def generate_market(spec: ScenarioSpec) -> Market:
+    return Market(generate_utilities(spec), generate_capacities(spec))
+
+
+def generate_scenario(spec: ScenarioSpec, directory: str) -> str:
+    """Generates the market of the spec straight to disk, see save_market. Returns the directory."""
+    os.makedirs(directory, exist_ok=True)
+    utilities = np.lib.format.open_memmap(os.path.join(directory, 'utilities.npy'), mode='w+', dtype=float,
+                                          shape=(spec.n_players, spec.n_courses))
+    generate_utilities(spec, utilities)
+    utilities.flush()
+    del utilities
+    np.save(os.path.join(directory, 'capacities.npy'), generate_capacities(spec))
+    _save_spec(directory, spec)
+    return directory
+
+
+def save_market(market: Market, directory: str, spec: ScenarioSpec = None, bids: bool=True):
+    """Writes the utilities, capacities and, if bids is set, the bids of the market to directory."""
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'utilities.npy'), market.utilities)
+    np.save(os.path.join(directory, 'capacities.npy'), market.capacities)
+    if bids:
+        np.save(os.path.join(directory, 'bids.npy'), market.bids)
+    _save_spec(directory, spec)
+
+
+def load_market(directory: str, mmap_mode: str='r') -> Market:
+    """
+    The market saved in directory, with its matrices memory-mapped in mmap_mode ('r', 'r+' or 'c' for copy on write,
+    None to read them into memory). Bids default to zeros if none were saved.
+    """
+    utilities = np.load(os.path.join(directory, 'utilities.npy'), mmap_mode=mmap_mode)
+    capacities = np.load(os.path.join(directory, 'capacities.npy'))
+    bids_path = os.path.join(directory, 'bids.npy')
+    bids = np.load(bids_path, mmap_mode=mmap_mode) if os.path.exists(bids_path) else None
+    return Market(utilities, capacities, bids=bids)
+
+
+def load_auction(directory: str, max_bid: float=100, clearing_function=None, mmap_mode: str='r') -> Auction:
+    return load_market(directory, mmap_mode).to_auction(max_bid, clearing_function)
+
+
+def load_spec(directory: str) -> ScenarioSpec:
+    """The spec the saved market was generated from, None if it was not generated."""
+    with open(os.path.join(directory, 'spec.json')) as spec_file:
+        spec = json.load(spec_file)
+    return ScenarioSpec(**spec) if spec is not None else None
+
+
+def _save_spec(directory: str, spec: ScenarioSpec):
+    with open(os.path.join(directory, 'spec.json'), 'w') as spec_file:
+        json.dump(spec._asdict() if spec is not None else None, spec_file)
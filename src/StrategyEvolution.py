@@ -1,124 +1,325 @@
-from scipy.stats import norm
-from typing import Callable
+from typing import Callable, NamedTuple, Tuple
 from src.Auction import *
+from src.Checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from src.EvolutionBudget import BudgetSummary, EvolutionBudget
+from src.FitnessCache import FitnessCache, profile_version
+from src.FitnessEstimation import estimate_fitnesses, race_fitnesses
+from src.Mechanisms import get_clearing_function
+from src.RandomStreams import get_rng
+from src.Telemetry import Telemetry, no_timing
 import random
 import numpy as np
 
 
+class EvolutionParameters(NamedTuple):
+    """Hyperparameters of one player's population update, see run_ga."""
+    tournament_prob: float = 0.75
+    tournament_size: int = 2
+    crossover_prob: float = 0.5
+    mutation_prob: float = 0.1
+    elitism_copies: int = 1
+    creep_factor: float = 0.2
+    max_bid: float = 100
+    fitness_samples: int = 100
+    fitness_tolerance: float = 0.01
+    fitness_racing: bool = False  # Estimate fitnesses with race_fitnesses instead of estimate_fitnesses.
+    racing_confidence: float = 3.0
+    racing_min_samples: int = 5
+
+
 def run_ga(auction=Auction(), generations=10e3, population_size=100, tournament_prob=0.75, tournament_size=2,
-           crossover_prob=0.5, mutation_prob=0.1, elitism_copies=1, creep_factor=0.2, start_range=1):
-    """Modifies players strategies to have them perform optimally, but modifies nothing else about the auction."""
-    players = auction.players
-    populations = [initialize_population(population_size, len(auction.courses), start_range, auction.max_bid) for _p in players]  # One population for each player.
+           crossover_prob=0.5, mutation_prob=0.1, elitism_copies=1, creep_factor=0.2, start_range=1,
+           fitness_samples=100, fitness_tolerance=0.01, workers=None, seed=None,
+           budget: EvolutionBudget = None, cache: FitnessCache = None, telemetry: Telemetry = None,
+           checkpoint: str = None, checkpoint_every: int = 1, islands: int = None,
+           migration_interval: int = 5, fitness_racing: bool = False, racing_confidence: float = 3.0,
+           racing_min_samples: int = 5, migrants: int = 2,
+           topology: Callable[[int, int], List[int]] = None) -> BudgetSummary:
+    """
+    Modifies players strategies to have them perform optimally, but modifies nothing else about the auction.
+    The budget decides how many inner iterations each player gets per generation (one by default) and can end the
+    run early after a number of fitness evaluations or seconds. Returns a summary of what the run spent.
+    A cache lets duplicate individuals and unchanged elites skip evaluation; it must not be shared between auctions.
+    With workers set, the players' populations are evolved in parallel by that many processes, see
+    src.ParallelEvolution.run_ga_parallel. The cache is not used in that mode.
+    A telemetry gets a record of the time spent, auctions cleared and fitnesses of every generation, see src.Telemetry.
+    In parallel mode the records have no stage timings or fitnesses.
+    With a checkpoint path, the state of the run is saved there every checkpoint_every generations and when it ends,
+    and resume_ga(checkpoint) continues the run exactly as if it had not been interrupted. Not in parallel mode.
+    With islands set, every player evolves that many populations of population_size individuals in worker processes,
+    sending their best migrants individuals every migration_interval generations to the islands topology connects them
+    to (a ring by default), see src.IslandEvolution.run_islands. A cache, telemetry or checkpoint is not supported in
+    that mode and raises a ValueError.
+    With fitness_racing, the individuals of a population are evaluated with common random numbers and clearly worse
+    individuals stop being sampled early, see src.FitnessEstimation.race_fitnesses, which racing_confidence and
+    racing_min_samples are passed to as confidence and min_samples.
+    """
+    parameters = EvolutionParameters(tournament_prob, tournament_size, crossover_prob, mutation_prob, elitism_copies,
+                                     creep_factor, auction.max_bid, fitness_samples, fitness_tolerance,
+                                     fitness_racing, racing_confidence, racing_min_samples)
+    if budget is None:
+        budget = EvolutionBudget()
+    budget.start()
+    if islands is not None:
+        if checkpoint is not None or cache is not None or telemetry is not None:
+            raise ValueError("Checkpoints, caches and telemetry are not supported in island mode")
+        from src.IslandEvolution import ring_topology, run_islands
+        return run_islands(auction, generations, population_size, parameters, islands, migration_interval, migrants,
+                           topology if topology is not None else ring_topology, start_range, workers, seed, budget)
+    if workers is not None:
+        if checkpoint is not None:
+            raise ValueError("Checkpoints are not supported in parallel mode")
+        from src.ParallelEvolution import run_ga_parallel
+        return run_ga_parallel(auction, generations, population_size, parameters, start_range, workers, seed, budget,
+                               telemetry)
+    if seed is not None:
+        random.seed(seed)
+    rng = np.random.default_rng(seed)
+    players = list(auction.players)
+    populations = [random_population(population_size, len(auction.courses), start_range, auction.max_bid, rng)
+                   for _p in players]  # One population for each player.
     for i in range(len(auction.players)):
         auction.players[i].population = populations[i]
-    for i_generation in range(int(generations)):
+    return _evolve(auction, players, 0, generations, parameters, rng, budget, cache, telemetry, checkpoint,
+                   checkpoint_every)
+
+
+def resume_ga(checkpoint: str, auction: Auction = None, budget: EvolutionBudget = None, cache: FitnessCache = None,
+              telemetry: Telemetry = None, checkpoint_every: int = 1) -> Tuple[Auction, BudgetSummary]:
+    """
+    Continues the run_ga run that saved the checkpoint, and keeps saving to it. The auction of the run is rebuilt from
+    the checkpoint unless it is given, with its players in their original order. The budget must have the schedule
+    and caps of the original run, its spending is restored from the checkpoint. The cache, if the run had one, is
+    restored from the checkpoint as well unless another one is given. Returns the auction and what the whole run spent.
+    """
+    state = load_checkpoint(checkpoint)
+    if auction is None:
+        from src.Market import Market
+        auction = Market(state.utilities, state.capacities).to_auction(state.max_bid,
+                                                                       get_clearing_function(state.clearing_function))
+    elif not np.array_equal(auction.utility_matrix(), state.utilities):
+        raise ValueError("The auction is not the one of the checkpoint")
+    players = list(auction.players)
+    for player, population, bids in zip(players, state.populations, state.bids):
+        player.population = population.copy()
+        player.strategy = decode_chromosome(bids)
+    auction.players[:] = [players[i] for i in state.order]
+    random.setstate(state.random_state)
+    rng = np.random.default_rng()
+    rng.bit_generator.state = state.rng_state
+    if budget is None:
+        budget = EvolutionBudget()
+    budget.resume(state.budget)
+    if cache is None:
+        cache = state.cache
+    summary = _evolve(auction, players, state.generation, state.generations, EvolutionParameters(**state.parameters),
+                      rng, budget, cache, telemetry, checkpoint, checkpoint_every)
+    return auction, summary
+
+
+def _evolve(auction: Auction, players: List[Player], first_generation: int, generations,
+            parameters: EvolutionParameters, rng: np.random.Generator, budget: EvolutionBudget, cache: FitnessCache,
+            telemetry: Telemetry, checkpoint: str, checkpoint_every: int) -> BudgetSummary:
+    """The generation loop of run_ga and resume_ga. players are the auction's players in their original order."""
+    next_generation = saved_generation = first_generation
+    for i_generation in range(first_generation, int(generations)):
+        if budget.exhausted():
+            break
+        if telemetry is not None:
+            telemetry.begin_generation(i_generation, players, budget, cache)
         random.shuffle(auction.players)
-        for player in players:
-            for _j in range(int(i_generation/1)):
-                population = player.population
-                decoded_population = list(map(lambda bids: decode_chromosome(bids), population))
-                fitnesses = get_fitnesses(auction, player, decoded_population)
-                best_individual_idx = fitnesses.index(max(fitnesses))
-                best_individual = population[best_individual_idx]
-
-                # Operators.
-                apply_selection(population, fitnesses, tournament_prob, tournament_size)
-                apply_crossover(population, crossover_prob)
-                apply_mutation(population, mutation_prob, creep_factor, auction.max_bid)
-                apply_elitism(population, best_individual, elitism_copies)
-                player.strategy = decoded_population[best_individual_idx]
-        # print(auction)
+        for player in auction.players:
+            evolve_population(auction, auction.players.index(player), player.population,
+                              budget.iterations_in(i_generation), parameters, rng, budget, cache, telemetry)
+        budget.end_generation()
+        if telemetry is not None:
+            telemetry.end_generation(budget, cache)
+        next_generation = i_generation + 1
+        if checkpoint is not None and (next_generation - first_generation) % checkpoint_every == 0:
+            _save(checkpoint, auction, players, next_generation, generations, parameters, rng, budget, cache)
+            saved_generation = next_generation
+    if checkpoint is not None and (saved_generation != next_generation or next_generation == first_generation):
+        _save(checkpoint, auction, players, next_generation, generations, parameters, rng, budget, cache)
+    return budget.summary()
+
+
+def _save(path: str, auction: Auction, players: List[Player], generation: int, generations,
+          parameters: EvolutionParameters, rng: np.random.Generator, budget: EvolutionBudget, cache: FitnessCache):
+    original_position = dict((id(player), i) for i, player in enumerate(players))
+    order = np.array([original_position[id(player)] for player in auction.players])
+    to_original = np.argsort(order)
+    save_checkpoint(path, Checkpoint(
+        generation, int(generations), parameters._asdict(), np.array([player.population for player in players]),
+        auction.bid_matrix()[to_original], auction.utility_matrix()[to_original], auction.capacities(),
+        auction.max_bid, auction.clearing_function.__name__, order, random.getstate(), rng.bit_generator.state,
+        budget.summary(), cache))
+
+
+def evolve_population(auction: Auction, player_idx: int, population: np.ndarray, iterations: int,
+                      parameters: EvolutionParameters, rng: np.random.Generator = None,
+                      budget: EvolutionBudget = None, cache: FitnessCache = None, telemetry: Telemetry = None):
+    """
+    Runs iterations generations of the population (population_size x courses, updated in place) of one player,
+    against the others' current strategies. Stops early, and records what was spent, if a budget is given.
+    Fitnesses are looked up in and added to the cache, if one is given. Stage timings and fitnesses go to the
+    telemetry, if one is given.
+    """
+    player = auction.players[player_idx]
+    timing = telemetry.timing if telemetry is not None else no_timing
+    for _j in range(iterations):
+        if budget is not None and budget.exhausted():
+            break
+        with timing('evaluation'):
+            fitnesses, evaluations, clearings = evaluate_population(auction, player_idx, population, parameters, rng,
+                                                                    cache, telemetry)
+        if telemetry is not None:
+            telemetry.record_fitnesses(player, fitnesses)
+        best_individual = population[int(np.argmax(fitnesses))].copy()
+
+        # Operators.
+        with timing('selection'):
+            population[:] = tournament_selection(population, fitnesses, parameters.tournament_prob,
+                                                 parameters.tournament_size, rng)
+        with timing('crossover'):
+            one_point_crossover(population, parameters.crossover_prob, rng)
+        with timing('mutation'):
+            creep_mutation(population, parameters.mutation_prob, parameters.creep_factor, parameters.max_bid, rng)
+        elitism(population, best_individual, parameters.elitism_copies)
+        player.strategy = decode_chromosome(best_individual)
+        if budget is not None:
+            budget.spend(evaluations, clearings)
+
+
+def evaluate_population(auction: Auction, player_idx: int, population: np.ndarray, parameters: EvolutionParameters,
+                        rng: np.random.Generator = None, cache: FitnessCache = None,
+                        telemetry: Telemetry = None) -> Tuple[np.ndarray, int, int]:
+    """Fitness of every individual, the number of individuals actually estimated and the auctions cleared for it."""
+    def estimate(individuals: np.ndarray) -> Tuple[np.ndarray, int]:
+        if parameters.fitness_racing:
+            estimates = race_fitnesses(auction, player_idx, individuals, max_samples=parameters.fitness_samples,
+                                       min_samples=parameters.racing_min_samples,
+                                       tolerance=parameters.fitness_tolerance,
+                                       confidence=parameters.racing_confidence, rng=rng, telemetry=telemetry)
+        else:
+            estimates = estimate_fitnesses(auction, player_idx, individuals, max_samples=parameters.fitness_samples,
+                                           tolerance=parameters.fitness_tolerance, rng=rng, telemetry=telemetry)
+        return estimates.mean, int(estimates.samples.sum())
+
+    if cache is None:
+        fitnesses, clearings = estimate(population)
+        return fitnesses, len(population), clearings
+    version = profile_version(auction.bid_matrix(), auction.utility_row(player_idx), player_idx)
+    return cache.evaluate(version, population, estimate)
 
 
 def decode_chromosome(bids: List[float]) -> Strategy:  # Returns a bidding strategy.
-    def strategy(courses: List[Course]):
-        assert(len(courses) == len(bids))
-        courses_and_bids = dict(zip(courses, bids))
-        return courses_and_bids
-    return strategy
+    return ArrayStrategy(np.asarray(bids, dtype=float))
+
 
+def initialize_population(population_size: int, chromosome_length: int, start_range: float=1,
+                          max_bid: float=math.inf, rng: np.random.Generator = None) -> List[List[float]]:
+    return random_population(population_size, chromosome_length, start_range, max_bid, rng).tolist()
 
-def initialize_population(population_size: int, chromosome_length: int, start_range: float, max_bid: float) -> List[List[float]]:
-    population = []
-    for i in range(population_size):
-        population.append([min(max_bid, abs(norm.rvs() * start_range)) for _i in range(chromosome_length)])
-    return population
+
+def random_population(population_size: int, chromosome_length: int, start_range: float=1, max_bid: float=math.inf,
+                      rng: np.random.Generator = None) -> np.ndarray:
+    """Genes are absolute values of normal draws scaled by start_range, drawn all at once, capped at max_bid."""
+    genes = get_rng(rng).standard_normal((population_size, chromosome_length))
+    return np.minimum(max_bid, np.abs(genes * start_range))
 
 
 def get_fitnesses(auction: Auction, player: Player, strategies: List[Strategy]) -> List[float]:
-    fitnesses = [.0] * len(strategies)
-    player_idx = auction.players.index(player)
-    for individual_idx in range(len(strategies)):
-        current_strategy = strategies[individual_idx]
-        auction.players[player_idx].strategy = current_strategy
-        res = auction.run_auction()
-        average_fitness = 0
-        for _i in range(1000):
-            pay, course = res[player_idx]
-            if course is None:
-                utility = 0
-            else:
-                utility = auction.players[player_idx].utilities[course]
-            fitness = utility - pay
-            average_fitness += fitness
-        average_fitness /= 1000
-        fitnesses[individual_idx] = average_fitness
-    return fitnesses
+    candidate_bids = [[strategy(auction.courses)[course] for course in auction.courses] for strategy in strategies]
+    return list(get_population_fitnesses(auction, auction.players.index(player), candidate_bids))
+
+
+def get_population_fitnesses(auction: Auction, player_idx: int, population: List[List[float]], max_samples: int=100,
+                             tolerance: float=0.01, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Expected payoff of every chromosome when played by player player_idx against the current strategies of the others,
+    estimated from at most max_samples clearings each.
+    """
+    return estimate_fitnesses(auction, player_idx, population, max_samples=max_samples, tolerance=tolerance,
+                              rng=rng).mean
 
 
 # Operators
+# The array operators work in place on a population_size x courses matrix and draw all their randomness from one
+# numpy Generator. The apply_* functions are the list-based interface, kept for compatibility.
+
+def elitism(population: np.ndarray, best_individual: np.ndarray, num_copies: int):
+    population[:num_copies] = best_individual
+
+
+def creep_mutation(population: np.ndarray, mutation_probability: float, creep_factor: float, max_bid: float,
+                   rng: np.random.Generator = None):
+    """Each gene moves, with probability mutation_probability, uniformly within a range around itself."""
+    rng = get_rng(rng)
+    mutate = rng.random(population.shape) < mutation_probability
+    creep_range = np.maximum(1.0, creep_factor * population)
+    # An infinite gene creeps to NaN (inf - inf), which fmax turns into 0 like the list-based operator did.
+    with np.errstate(invalid='ignore'):
+        creep = rng.random(population.shape) * creep_range - creep_range / 2
+        population[mutate] = np.fmin(max_bid, np.fmax(0.0, population + creep))[mutate]
+
+
+def one_point_crossover(population: np.ndarray, crossover_probability: float, rng: np.random.Generator = None):
+    """Neighbouring individuals swap their genes after a random point, with probability crossover_probability."""
+    assert(len(population) % 2 == 0)
+    rng = get_rng(rng)
+    n_pairs, chromosome_length = len(population) // 2, population.shape[1]
+    crossing = rng.random(n_pairs) < crossover_probability
+    slicepoints = rng.integers(chromosome_length, size=n_pairs)
+    swap = crossing[:, None] & (np.arange(chromosome_length)[None, :] >= slicepoints[:, None])
+    first, second = population[0::2], population[1::2]
+    swapped_first = np.where(swap, second, first)
+    second[...] = np.where(swap, first, second)
+    first[...] = swapped_first
+
+
+def tournament_selection(population: np.ndarray, fitnesses: np.ndarray, tournament_prob: float, tournament_size: int,
+                         rng: np.random.Generator = None) -> np.ndarray:
+    """
+    A new population of tournament winners. In each tournament the fittest contestant wins with probability
+    tournament_prob, otherwise the next fittest plays on, and the least fit wins if everybody before it lost.
+    """
+    rng = get_rng(rng)
+    n_individuals = len(population)
+    contestants = rng.integers(n_individuals, size=(n_individuals, tournament_size))
+    ranking = np.argsort(-np.asarray(fitnesses)[contestants], axis=1, kind='stable')  # Fitness, high to low.
+    contestants = np.take_along_axis(contestants, ranking, axis=1)
+    if tournament_prob > 0:
+        losses = rng.geometric(min(tournament_prob, 1.0), size=n_individuals) - 1
+    else:
+        losses = np.full(n_individuals, tournament_size - 1)
+    winners = contestants[np.arange(n_individuals), np.minimum(losses, tournament_size - 1)]
+    return population[winners]
+
 
 def apply_elitism(population, best_individual, num_copies):
     for i in range(num_copies):
-        population[i] = best_individual.copy()
+        population[i] = list(best_individual)
 
 
-def apply_mutation(population: List[List[float]], mutation_probability: float, creep_factor: float, max_bid):
-    for chromosome in population:
-        for i in range(len(chromosome)):
-            if mutation_probability > random.random():
-                creep_range = max(1.0, creep_factor * chromosome[i])
-                creep = random.random() * creep_range - creep_range / 2
-                new_gene = max(0.0, chromosome[i] + creep)
-                new_gene = min(max_bid, new_gene)
-                chromosome[i] = new_gene
+def apply_mutation(population: List[List[float]], mutation_probability: float, creep_factor: float, max_bid,
+                   rng: np.random.Generator = None):
+    population_matrix = np.array(population, dtype=float)
+    creep_mutation(population_matrix, mutation_probability, creep_factor, max_bid, rng)
+    for chromosome, mutated in zip(population, population_matrix.tolist()):
+        chromosome[:] = mutated
 
 
-def apply_crossover(population: List[List[float]], crossover_probability: float):
-    assert(len(population) % 2 == 0)
-    for i in range(0, len(population), 2):
-        if crossover_probability > random.random():
-            ind1, ind2 = population[i], population[i+1]
-            max_slicepoint = min(len(ind1), len(ind2))
-            slicepoint = random.choice(range(max_slicepoint))
-            new_ind1 = ind1[:slicepoint] + ind2[slicepoint:]
-            new_ind2 = ind2[:slicepoint] + ind1[slicepoint:]
-            population[i] = new_ind1
-            population[i+1] = new_ind2
-
-
-def apply_selection(population: List[List[float]], fitnesses: List[float], tournament_prob: float, tournament_size: int):
-    new_population = [None] * len(population)
-    for individual_idx in range(len(population)):
-        # Pick contestants.
-        contestants = [None] * tournament_size
-        for contestant_idx in range(tournament_size):
-            r = random.choice(range(len(population)))
-            contestants[contestant_idx] = (fitnesses[r], population[r])
-        # Sort them.
-        contestants.sort(key=lambda x: x[0], reverse=True)  # Sort on fitness, high to low.
-        # Play them off against each other.
-        tourn_idx = 0
-        while random.random() > tournament_prob and tourn_idx < tournament_size - 1:
-            tourn_idx += 1
-        # Add winner to population.
-        _winner_fitness, winner = contestants[tourn_idx]
-        new_population[individual_idx] = winner
-        # End single tournament.
-    # End population creation.
-    for i in range(len(new_population)):
-        population[i] = new_population[i]
+def apply_crossover(population: List[List[float]], crossover_probability: float, rng: np.random.Generator = None):
+    population_matrix = np.array(population, dtype=float)
+    one_point_crossover(population_matrix, crossover_probability, rng)
+    population[:] = population_matrix.tolist()
+
+
+def apply_selection(population: List[List[float]], fitnesses: List[float], tournament_prob: float, tournament_size: int,
+                    rng: np.random.Generator = None):
+    new_population = tournament_selection(np.array(population, dtype=float), fitnesses, tournament_prob,
+                                          tournament_size, rng)
+    population[:] = new_population.tolist()
 
 
 def unzip(l):
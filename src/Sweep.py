@@ -0,0 +1,96 @@
+"""
+Parameter sweeps over the fixed auctions.
+
+Every point of the grid is run independently on a clean copy of its scenario from src.FixedAuctions, by a pool of
+worker processes. Results are appended to a JSON lines file as the points finish, one record per point, and points
+that already have a record in the file are skipped, so an interrupted sweep is resumed by running it again.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple
+import copy
+import itertools
+import json
+import os
+import time
+
+from src.Efficiency import estimate_efficiency
+from src.Mechanisms import get_clearing_function
+from src.StrategyEvolution import run_ga
+
+
+class SweepPoint(NamedTuple):
+    scenario: str  # Key in src.FixedAuctions.fixed_auctions.
+    max_bid: float
+    clearing_function: str = None  # Mechanism or clearing function name, None keeps the scenario's.
+    ga_parameters: Dict = None  # Keyword arguments to run_ga, None for none.
+    seed: int = 0
+
+    def key(self) -> str:
+        # None and no parameters are the same point, and keyed as such by earlier versions.
+        return json.dumps(dict(self._asdict(), ga_parameters=self.ga_parameters or {}), sort_keys=True)
+
+
+def sweep_grid(scenarios: List[str], max_bids: List[float], clearing_functions: List[str]=(None,),
+               ga_parameters: List[Dict]=(None,), seeds: List[int]=(0,)) -> List[SweepPoint]:
+    """All combinations of the given values."""
+    return [SweepPoint(*values) for values in itertools.product(scenarios, max_bids, clearing_functions,
+                                                                 ga_parameters, seeds)]
+
+
+def run_point(point: SweepPoint) -> Dict:
+    """Runs the GA on a clean copy of the scenario and returns the result record of the point."""
+    from src.FixedAuctions import fixed_auctions
+    auction = copy.deepcopy(fixed_auctions[point.scenario])
+    auction.max_bid = point.max_bid
+    if point.clearing_function is not None:
+        auction.clearing_function = get_clearing_function(point.clearing_function)
+    parameters = dict(start_range=point.max_bid)
+    parameters.update(point.ga_parameters or {})
+    start = time.perf_counter()
+    spent = run_ga(auction=auction, seed=point.seed, **parameters)
+    ga_seconds = time.perf_counter() - start
+    efficiency = estimate_efficiency(auction)
+    record = point._asdict()
+    record.update(key=point.key(), total_utility=efficiency.welfare, max_utility=efficiency.benchmark_welfare,
+                  efficiency=efficiency.welfare_ratio, welfare_interval=efficiency.confidence_interval,
+                  ga_seconds=ga_seconds,
+                  seconds=time.perf_counter() - start, budget=spent._asdict(),
+                  best_strategies=auction.bid_matrix().tolist())
+    return record
+
+
+def finished_keys(results_path: str) -> set:
+    """Keys of the points that already have a record in the results file."""
+    keys = set()
+    if not os.path.exists(results_path):
+        return keys
+    with open(results_path) as results:
+        for line in results:
+            try:
+                keys.add(json.loads(line)['key'])
+            except (ValueError, KeyError):
+                pass  # A line cut off by an interruption, that point is run again.
+    return keys
+
+
+def run_sweep(points: List[SweepPoint], results_path: str, workers: int=None) -> Iterator[Dict]:
+    """Runs the points not yet in results_path, appending and yielding their records as they finish."""
+    done = finished_keys(results_path)
+    todo = [point for point in points if point.key() not in done]
+    if not todo:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(results_path, 'a') as results:
+        if results.tell() > 0 and not _ends_with_newline(results_path):
+            results.write("\n")  # Terminate a record cut off by an interruption.
+        futures = [pool.submit(run_point, point) for point in todo]
+        for future in as_completed(futures):
+            record = future.result()
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            yield record
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
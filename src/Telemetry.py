@@ -0,0 +1,99 @@
+"""
+Opt-in instrumentation of run_ga.
+
+A Telemetry collects, for every generation, the time spent in each stage of the players' population updates
+(evaluation, of which clearing is a part, selection, crossover, mutation), the auctions cleared, the best, mean and
+standard deviation of every player's fitnesses and the fitness cache hit rate. At the end of the generation the
+collected record, a dict of plain JSON values, is passed to each of its hooks; JsonLinesLogger is a hook that appends
+the records to a file. Without a Telemetry the instrumented code only pays for a None check and an empty with block.
+"""
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List
+import json
+import time
+import numpy as np
+
+Hook = Callable[[Dict], None]  # Called with the record of every finished generation.
+
+_NO_TIMING = nullcontext()
+
+
+def no_timing(_stage: str):
+    """Stand-in for Telemetry.timing when telemetry is disabled."""
+    return _NO_TIMING
+
+
+class Telemetry:
+    def __init__(self, *hooks: Hook):
+        self.hooks = list(hooks)
+        self._seconds = defaultdict(float)
+        self._fitnesses = {}
+        self._player_numbers = {}
+        self._generation = None
+        self._start = None
+        self._spent_before = None
+        self._cache_before = None
+
+    def add_hook(self, hook: Hook):
+        self.hooks.append(hook)
+
+    @contextmanager
+    def timing(self, stage: str):
+        """Adds the time spent in the with block to the stage's total for this generation."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._seconds[stage] += time.perf_counter() - start
+
+    def begin_generation(self, generation: int, players: List, budget, cache=None):
+        """Players are numbered by their position in players, which should not change between generations."""
+        self._generation = generation
+        self._player_numbers = dict((id(player), i) for i, player in enumerate(players))
+        self._seconds.clear()
+        self._fitnesses.clear()
+        self._spent_before = (budget.evaluations, budget.clearings, budget.iterations)
+        self._cache_before = (cache.hits, cache.misses) if cache is not None else None
+        self._start = time.perf_counter()
+
+    def record_fitnesses(self, player, fitnesses: np.ndarray):
+        """Fitnesses of the player's population, the last ones recorded in a generation are reported."""
+        fitnesses = np.asarray(fitnesses, dtype=float)
+        self._fitnesses[self._player_numbers.get(id(player), -1)] = dict(
+            best=float(fitnesses.max()), mean=float(fitnesses.mean()), std=float(fitnesses.std()))
+
+    def end_generation(self, budget, cache=None) -> Dict:
+        """Builds the record of the generation and passes it to the hooks."""
+        evaluations, clearings, iterations = self._spent_before
+        record = dict(generation=self._generation, seconds=time.perf_counter() - self._start,
+                      stages=dict(self._seconds), iterations=budget.iterations - iterations,
+                      evaluations=budget.evaluations - evaluations, clearings=budget.clearings - clearings,
+                      players=[dict(player=number, **stats) for number, stats in sorted(self._fitnesses.items())])
+        if cache is not None:
+            hits, misses = cache.hits - self._cache_before[0], cache.misses - self._cache_before[1]
+            record['cache_hit_rate'] = hits / (hits + misses) if hits + misses else 0.0
+            record['cache_entries'] = len(cache)
+        for hook in self.hooks:
+            hook(record)
+        return record
+
+
+class JsonLinesLogger:
+    """Hook writing every record as a line of JSON. Lines are flushed right away, so a stalled run can be inspected."""
+    def __init__(self, path: str, mode: str='a'):
+        self.path = path
+        self._file = open(path, mode)
+
+    def __call__(self, record: Dict):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
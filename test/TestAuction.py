@@ -31,4 +31,20 @@ class TestAuction(unittest.TestCase):
         auction = Auction()  # Default implementation.
         auction.run_auction()  # Just make sure nothing fails.
 
-
+    def test_run_auction_batch(self):
+        random.seed(7)
+        courses = [Course(capacity=2), Course(capacity=1)]
+        players = [Player(utilities={courses[0]: random.random() * 10, courses[1]: random.random() * 10})
+                   for _i in range(5)]
+        for p in players:
+            bids = [random.random() for _c in courses]
+            p.strategy = lambda cs, bids=bids: dict(zip(cs, bids))
+        auction = Auction(courses=courses, players=players, clearing_function=second_price_clearing_function)
+        candidates = [[random.random(), random.random()] for _i in range(20)]
+        payoffs = auction.run_auction_batch(candidates, 3)
+        self.assertEqual(len(payoffs), len(candidates))
+        for candidate, payoff in zip(candidates, payoffs):
+            players[3].strategy = lambda cs, bids=candidate: dict(zip(cs, bids))
+            pay, course = auction.run_auction()[3]
+            utility = 0 if course is None else players[3].utilities[course]
+            self.assertAlmostEqual(utility - pay, payoff)
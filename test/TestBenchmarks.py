@@ -0,0 +1,29 @@
+import unittest
+import numpy as np
+from benchmarks.ImportCost import measure
+from benchmarks.Suite import regressions, synthetic_market
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_synthetic_market_is_reproducible(self):
+        market = synthetic_market(50, 4, seed=3)
+        self.assertEqual(market.utilities.shape, (50, 4))
+        np.testing.assert_array_equal(market.bids, synthetic_market(50, 4, seed=3).bids)
+        self.assertTrue(np.all(market.bids <= market.utilities))
+
+    def test_regressions(self):
+        baseline = dict(benchmarks={'a': dict(seconds=1.0), 'b': dict(seconds=1.0), 'gone': dict(seconds=1.0)})
+        results = dict(benchmarks={'a': dict(seconds=1.2), 'b': dict(seconds=2.0), 'new': dict(seconds=9.0)})
+        self.assertListEqual(regressions(results, baseline, 0.25), [('b', 1.0, 2.0)])
+        self.assertListEqual(regressions(results, baseline, 0.1), [('a', 1.0, 1.2), ('b', 1.0, 2.0)])
+
+    def test_small_differences_are_noise(self):
+        baseline = dict(benchmarks={'a': dict(seconds=0.001)})
+        results = dict(benchmarks={'a': dict(seconds=0.002)})
+        self.assertListEqual(regressions(results, baseline, 0.25), [])
+        self.assertListEqual(regressions(results, baseline, 0.25, min_difference=0.0), [('a', 0.001, 0.002)])
+
+    def test_import_does_not_load_plotting_or_scipy(self):
+        for module in ['src.StrategyEvolution', 'src.ParallelEvolution']:
+            self.assertListEqual(measure('import ' + module)['heavy'], [])
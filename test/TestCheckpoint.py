@@ -0,0 +1,72 @@
+import unittest
+import os
+import tempfile
+from src.StrategyEvolution import *
+from src.Checkpoint import *
+from src.FitnessCache import FitnessCache
+from src.Telemetry import Telemetry
+
+
+class Preempted(Exception):
+    pass
+
+
+def preempt_after(generation):
+    def hook(record):
+        if record['generation'] == generation:
+            raise Preempted()
+    return hook
+
+
+def make_auction():
+    courses = [Course(capacity=1), Course(capacity=2)]
+    players = [Player(utilities={courses[0]: u, courses[1]: 10 - u}) for u in [1.0, 4.0, 5.0, 9.0]]
+    return Auction(max_bid=10, courses=courses, players=players,
+                   clearing_function=second_price_clearing_function)
+
+
+def bids_by_utility(auction):
+    return auction.bid_matrix()[np.argsort(auction.utility_matrix()[:, 0])]
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "checkpoint.npz")
+
+    def test_resume_is_identical(self):
+        for cache in [None, FitnessCache()]:
+            uninterrupted = make_auction()
+            summary = run_ga(auction=uninterrupted, generations=6, population_size=10, seed=5, start_range=10,
+                             cache=None if cache is None else FitnessCache())
+            with self.assertRaises(Preempted):
+                run_ga(auction=make_auction(), generations=6, population_size=10, seed=5, start_range=10, cache=cache,
+                       checkpoint=self.path, telemetry=Telemetry(preempt_after(2)))
+            self.assertEqual(load_checkpoint(self.path).generation, 2)
+            resumed, resumed_summary = resume_ga(self.path, auction=make_auction())
+            np.testing.assert_array_equal(bids_by_utility(uninterrupted), bids_by_utility(resumed))
+            self.assertTupleEqual(summary[:4], resumed_summary[:4])
+
+    def test_resume_rebuilds_auction(self):
+        auction = make_auction()
+        run_ga(auction=auction, generations=3, population_size=10, seed=6, checkpoint=self.path)
+        resumed, summary = resume_ga(self.path)
+        self.assertEqual(summary.generations, 3)
+        np.testing.assert_array_equal(bids_by_utility(auction), bids_by_utility(resumed))
+        self.assertEqual(resumed.clearing_function, second_price_clearing_function)
+
+    def test_save_and_load(self):
+        cache = FitnessCache()
+        cache.put((b'\x00' * 16, np.array([1.0, 2.0]).tobytes()), 3.0)
+        checkpoint = Checkpoint(1, 5, EvolutionParameters()._asdict(), np.zeros((2, 4, 3)), np.ones((2, 3)),
+                                np.ones((2, 3)), np.array([1, 1, 1]), math.inf, 'first_price_clearing_function',
+                                np.array([1, 0]), random.getstate(), np.random.default_rng(1).bit_generator.state,
+                                EvolutionBudget().summary(), cache)
+        save_checkpoint(self.path, checkpoint)
+        loaded = load_checkpoint(self.path)
+        self.assertEqual(loaded.random_state, checkpoint.random_state)
+        self.assertEqual(loaded.rng_state, checkpoint.rng_state)
+        self.assertEqual(loaded.max_bid, math.inf)
+        self.assertEqual(loaded.budget, checkpoint.budget)
+        self.assertListEqual(loaded.cache.entries(), cache.entries())
+        np.testing.assert_array_equal(loaded.populations, checkpoint.populations)
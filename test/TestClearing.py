@@ -0,0 +1,96 @@
+import unittest
+import random
+import numpy as np
+from src.Auction import *
+from src.Clearing import *
+
+
+def random_market(n_players, n_courses, max_capacity=3):
+    """Market with distinct bids, so the reference clearing functions are deterministic."""
+    courses = [Course(capacity=random.randint(0, max_capacity)) for _i in range(n_courses)]
+    bids = [dict((course, random.random() * 100) for course in courses) for _p in range(n_players)]
+    return courses, bids
+
+
+class TestClearing(unittest.TestCase):
+
+    def test_first_price_matches_reference(self):
+        random.seed(1)
+        for _i in range(200):
+            courses, bids = random_market(random.randint(1, 12), random.randint(1, 5))
+            self.assertListEqual(first_price_clearing_function(bids), vectorized_first_price_clearing_function(bids))
+
+    def test_second_price_matches_reference(self):
+        random.seed(2)
+        for _i in range(200):
+            courses, bids = random_market(random.randint(1, 12), random.randint(1, 5))
+            self.assertListEqual(second_price_clearing_function(bids), vectorized_second_price_clearing_function(bids))
+
+    def test_partial_bids_match_reference(self):
+        random.seed(3)
+        for _i in range(100):
+            courses, bids = random_market(random.randint(1, 10), random.randint(2, 5))
+            for bids_of_player in bids:
+                del bids_of_player[random.choice(list(bids_of_player))]
+            self.assertListEqual(first_price_clearing_function(bids), vectorized_first_price_clearing_function(bids))
+            self.assertListEqual(second_price_clearing_function(bids), vectorized_second_price_clearing_function(bids))
+
+    def test_batch_matches_single_markets(self):
+        rng = np.random.default_rng(4)
+        bids = rng.random((6, 10, 4)) * 10
+        capacities = np.array([1, 2, 0, 3])
+        payments, courses = second_price_clearing(bids, capacities)
+        self.assertEqual(payments.shape, (6, 10))
+        for i in range(len(bids)):
+            single_payments, single_courses = second_price_clearing(bids[i], capacities)
+            np.testing.assert_array_equal(single_courses, courses[i])
+            np.testing.assert_array_equal(single_payments, payments[i])
+
+    def test_random_tie_breaking(self):
+        bids = np.array([[5.0], [5.0]])
+        winners = set()
+        rng = np.random.default_rng(5)
+        for _i in range(50):
+            _payments, courses = first_price_clearing(bids, np.array([1]), rng=rng)
+            winners.add(int(np.argmax(courses == 0)))
+            self.assertEqual(np.sum(courses == 0), 1)
+        self.assertSetEqual(winners, {0, 1})
+
+    def test_shared_tie_break(self):
+        bids = np.full((3, 4, 2), 1.0)
+        tie_break = np.random.default_rng(6).random((4, 2))
+        _payments, courses = first_price_clearing(bids, np.array([1, 1]), tie_break=tie_break)
+        np.testing.assert_array_equal(courses[0], courses[1])
+        np.testing.assert_array_equal(courses[0], courses[2])
+
+    def test_large_matches_batch_engine(self):
+        rng = np.random.default_rng(7)
+        for _i in range(100):
+            n_players, n_courses = rng.integers(1, 60), rng.integers(1, 12)
+            bids = rng.random((n_players, n_courses)) * 100
+            bids[rng.random(bids.shape) < 0.2] = np.nan
+            capacities = rng.integers(0, 8, n_courses)
+            for large, batch in [(first_price_clearing_large, first_price_clearing),
+                                 (second_price_clearing_large, second_price_clearing)]:
+                payments, courses = large(bids, capacities)
+                expected_payments, expected_courses = batch(bids, capacities)
+                np.testing.assert_array_equal(courses, expected_courses)
+                np.testing.assert_array_equal(payments, expected_payments)
+
+    def test_large_stops_early(self):
+        rng = np.random.default_rng(8)
+        bids = rng.random((2000, 50))
+        capacities = np.full(50, 10)
+        stats = {}
+        second_price_clearing_large(bids, capacities, stats=stats)
+        self.assertEqual(stats['bids'], bids.size)
+        self.assertLess(stats['sorted'], bids.size // 10)
+        self.assertLessEqual(stats['visited'], stats['sorted'])
+
+    def test_large_random_tie_breaking(self):
+        winners = set()
+        rng = np.random.default_rng(9)
+        for _i in range(50):
+            _payments, courses = first_price_clearing_large(np.array([[5.0], [5.0]]), np.array([1]), rng=rng)
+            winners.add(int(np.argmax(courses == 0)))
+        self.assertSetEqual(winners, {0, 1})
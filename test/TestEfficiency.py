@@ -0,0 +1,58 @@
+import unittest
+import random
+import numpy as np
+from src.Auction import *
+from src.Efficiency import *
+
+
+def fixed_bids(bids):
+    return lambda courses: dict(zip(courses, bids))
+
+
+class TestEfficiency(unittest.TestCase):
+
+    def test_deterministic_market(self):
+        random.seed(5)
+        courses = [Course(capacity=2), Course(capacity=1)]
+        players = [Player(strategy=fixed_bids([random.random(), random.random()]),
+                          utilities={courses[0]: random.random() * 10, courses[1]: random.random() * 10})
+                   for _i in range(6)]
+        auction = Auction(courses=courses, players=players, clearing_function=second_price_clearing_function)
+        estimate = estimate_efficiency(auction, benchmark='greedy')
+        self.assertEqual(estimate.samples, 1)
+        res = auction.run_auction()
+        expected = sum(p.utilities[course] for p, (_pay, course) in zip(players, res) if course is not None)
+        self.assertAlmostEqual(estimate.welfare, expected)
+        optimal_res = second_price_clearing_function([p.utilities for p in players])
+        benchmark = sum(p.utilities[course] for p, (_pay, course) in zip(players, optimal_res) if course is not None)
+        self.assertAlmostEqual(estimate.benchmark_welfare, benchmark)
+        self.assertAlmostEqual(estimate.welfare_ratio, expected / benchmark)
+        self.assertEqual(estimate.confidence_interval, (estimate.welfare, estimate.welfare))
+
+    def test_random_market(self):
+        course = Course(capacity=1)
+        players = [Player(strategy=fixed_bids([1.0]), utilities={course: u}) for u in [2.0, 4.0]]
+        auction = Auction(courses=[course], players=players)
+        estimate = estimate_efficiency(auction, samples=4000, rng=np.random.default_rng(1))
+        self.assertEqual(estimate.samples, 4000)
+        self.assertEqual(estimate.benchmark_welfare, 4.0)
+        low, high = estimate.confidence_interval
+        self.assertLess(low, 3.0)
+        self.assertGreater(high, 3.0)
+        self.assertAlmostEqual(estimate.welfare_ratio, 0.75, delta=0.05)
+
+    def test_get_allocative_efficiency(self):
+        auction = Auction()
+        total_utility, max_utility = auction.get_allocative_efficiency()
+        self.assertEqual((total_utility, max_utility), (0.0, 0.0))
+
+    def test_optimal_benchmark(self):
+        # Greedy gives the single seat of the first course to player 0, who values the second one almost as much.
+        courses = [Course(capacity=1), Course(capacity=1)]
+        players = [Player(strategy=fixed_bids([10.0, 9.0]), utilities={courses[0]: 10.0, courses[1]: 9.0}),
+                   Player(strategy=fixed_bids([8.0, 0.0]), utilities={courses[0]: 8.0, courses[1]: 0.0})]
+        auction = Auction(courses=courses, players=players)
+        self.assertEqual(estimate_efficiency(auction, benchmark='greedy').benchmark_welfare, 10.0)
+        estimate = estimate_efficiency(auction)
+        self.assertEqual(estimate.benchmark_welfare, 17.0)
+        self.assertAlmostEqual(estimate.welfare_ratio, 10.0 / 17.0)
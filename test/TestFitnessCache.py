@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from src.FitnessCache import *
+
+
+class TestFitnessCache(unittest.TestCase):
+
+    def setUp(self):
+        self.estimated_rows = []
+
+    def estimate(self, rows):
+        self.estimated_rows.extend(rows.tolist())
+        return rows.sum(axis=1), 10 * len(rows)
+
+    def test_duplicates_and_repeats_are_estimated_once(self):
+        cache = FitnessCache()
+        population = np.array([[1.0, 2.0], [3.0, 4.0], [1.0, 2.0]])
+        fitnesses, evaluated, clearings = cache.evaluate(b"v1", population, self.estimate)
+        np.testing.assert_array_equal(fitnesses, [3.0, 7.0, 3.0])
+        self.assertEqual((evaluated, clearings), (2, 20))
+        fitnesses, evaluated, clearings = cache.evaluate(b"v1", population, self.estimate)
+        np.testing.assert_array_equal(fitnesses, [3.0, 7.0, 3.0])
+        self.assertEqual((evaluated, clearings), (0, 0))
+        self.assertEqual(len(self.estimated_rows), 2)
+        self.assertEqual((cache.hits, cache.misses), (4, 2))
+
+    def test_new_profile_version_misses(self):
+        cache = FitnessCache()
+        cache.evaluate(b"v1", np.array([[1.0]]), self.estimate)
+        cache.evaluate(b"v2", np.array([[1.0]]), self.estimate)
+        self.assertEqual(len(self.estimated_rows), 2)
+
+    def test_lru_eviction(self):
+        cache = FitnessCache(max_bytes=2 * (8 + 200))
+        for value in [1.0, 2.0, 1.0, 3.0]:
+            cache.evaluate(b"v", np.array([[value]]), self.estimate)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        cache.evaluate(b"v", np.array([[1.0]]), self.estimate)  # Recently used, kept.
+        cache.evaluate(b"v", np.array([[2.0]]), self.estimate)  # Least recently used, evicted.
+        self.assertListEqual(self.estimated_rows, [[1.0], [2.0], [3.0], [2.0]])
+
+    def test_profile_version_ignores_player_order(self):
+        bids = np.array([[1.0, 2.0], [5.0, 6.0], [3.0, 4.0]])
+        utilities = np.array([1.0, 1.0])
+        self.assertEqual(profile_version(bids, utilities, 0), profile_version(bids[[0, 2, 1]], utilities, 0))
+        self.assertNotEqual(profile_version(bids, utilities, 0), profile_version(bids, utilities, 1))
@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from src.Auction import *
+from src.FitnessEstimation import *
+
+
+def fixed_bids(bids):
+    return lambda courses: dict(zip(courses, bids))
+
+
+class TestFitnessEstimation(unittest.TestCase):
+
+    def setUp(self):
+        self.course = Course(capacity=1)
+        self.auction = Auction(courses=[self.course], players=[
+            Player(strategy=fixed_bids([5.0]), utilities={self.course: 10.0}),
+            Player(strategy=fixed_bids([5.0]), utilities={self.course: 10.0}),
+        ])
+
+    def test_deterministic_market_cleared_once(self):
+        estimate = estimate_fitnesses(self.auction, 0, [[6.0], [4.0]])
+        np.testing.assert_array_equal(estimate.samples, [1, 1])
+        np.testing.assert_array_almost_equal(estimate.mean, [4.0, 0.0])
+        np.testing.assert_array_equal(estimate.variance, [0.0, 0.0])
+
+    def test_ties_are_sampled(self):
+        rng = np.random.default_rng(3)
+        estimate = estimate_fitnesses(self.auction, 0, [[5.0]], max_samples=2000, tolerance=0.05, rng=rng)
+        self.assertGreater(estimate.samples[0], 1)
+        self.assertLessEqual(estimate.samples[0], 2000)
+        self.assertAlmostEqual(estimate.mean[0], 2.5, delta=0.3)  # Wins half of the time and pays 5.
+        self.assertAlmostEqual(estimate.variance[0], 6.25, delta=0.5)
+
+    def test_sample_budget(self):
+        estimate = estimate_fitnesses(self.auction, 0, [[5.0]] * 3, max_samples=30, tolerance=0.0)
+        np.testing.assert_array_equal(estimate.samples, [30, 30, 30])
+
+    def test_batches_are_bounded(self):
+        import src.FitnessEstimation
+        batch_sizes = []
+        clear_batch = self.auction.clear_batch
+
+        def recording_clear_batch(bids, *args, **kwargs):
+            batch_sizes.append(bids.size)
+            return clear_batch(bids, *args, **kwargs)
+        self.auction.clear_batch = recording_clear_batch
+        max_entries = src.FitnessEstimation._MAX_BATCH_ENTRIES
+        src.FitnessEstimation._MAX_BATCH_ENTRIES = 20  # Ten markets of one tied player pair.
+        try:
+            estimate = estimate_fitnesses(self.auction, 0, [[5.0]] * 30, max_samples=50, min_samples=50)
+            race_fitnesses(self.auction, 0, [[5.0]] * 30, max_samples=50, min_samples=50)
+        finally:
+            src.FitnessEstimation._MAX_BATCH_ENTRIES = max_entries
+        self.assertLessEqual(max(batch_sizes), 20)
+        np.testing.assert_array_equal(estimate.samples, 50)
+
+    def test_has_ties(self):
+        self.assertListEqual(list(has_ties(np.array([[[1.0, 2.0]], [[2.0, 2.0]]]))), [False, True])
+
+    def test_race_common_random_numbers(self):
+        rng = np.random.default_rng(4)
+        estimate = race_fitnesses(self.auction, 0, [[5.0]] * 3, max_samples=5, tolerance=0.0, batch_size=2, rng=rng)
+        np.testing.assert_array_equal(estimate.samples, [5, 5, 5])
+        # Identical individuals are cleared with the same keys, so their payoffs are the same in every sample.
+        self.assertEqual(len(set(estimate.mean)), 1)
+        self.assertEqual(len(set(estimate.variance)), 1)
+
+    def test_race_drops_dominated(self):
+        course = Course(capacity=1)
+        auction = Auction(courses=[course], players=[
+            Player(strategy=fixed_bids([5.0]), utilities={course: 10.0}),
+            Player(strategy=fixed_bids([5.0]), utilities={course: 10.0}),
+            Player(strategy=fixed_bids([2.0]), utilities={course: 10.0}),
+        ])
+        rng = np.random.default_rng(5)
+        estimate = race_fitnesses(auction, 0, [[5.0], [2.0], [6.0]], max_samples=2000, tolerance=0.0, rng=rng)
+        self.assertEqual(estimate.samples[0], 2000)  # The leader, sampled until max_samples with tolerance 0.
+        self.assertLess(estimate.samples[1], 100)  # Never wins, clearly worse than the leader.
+        self.assertEqual(estimate.samples[2], 1)  # No ties, deterministic.
+        np.testing.assert_array_almost_equal(estimate.mean[1:], [0.0, 4.0])
+        self.assertAlmostEqual(estimate.mean[0], 2.5, delta=0.3)
+
+    def test_race_orders_clearly_different(self):
+        first, second = Course(capacity=1), Course(capacity=1)
+        auction = Auction(courses=[first, second], players=[
+            Player(strategy=fixed_bids([5.0, 5.0]), utilities={first: 10.0, second: 4.0}),
+            Player(strategy=fixed_bids([5.0, 5.0]), utilities={first: 10.0, second: 4.0}),
+        ])
+        for seed in range(10):
+            # Expected payoffs 14 / 3 and about 2.
+            estimate = race_fitnesses(auction, 0, [[5.0, 5.0], [5.0, 0.0]], rng=np.random.default_rng(seed))
+            self.assertGreater(estimate.mean[1], estimate.mean[0])
+            self.assertLess(estimate.samples[0], estimate.samples[1])  # The worse one drops out of the race early.
@@ -0,0 +1,49 @@
+import unittest
+from src.StrategyEvolution import *
+from src.IslandEvolution import *
+
+
+def make_auction():
+    courses = [Course(capacity=1), Course(capacity=2)]
+    players = [Player(utilities={courses[0]: u, courses[1]: 10 - u}) for u in [1.0, 4.0, 6.0, 9.0]]
+    return Auction(max_bid=10, courses=courses, players=players)
+
+
+class TestIslandEvolution(unittest.TestCase):
+
+    def test_run_ga_islands(self):
+        auction = make_auction()
+        summary = run_ga(auction=auction, generations=6, population_size=10, islands=3, migration_interval=2,
+                         workers=2, seed=1)
+        self.assertEqual(summary.generations, 6)
+        self.assertEqual(summary.iterations, 6 * 3 * len(auction.players))
+        for player in auction.players:
+            self.assertEqual(player.population.shape, (30, 2))
+            self.assertTrue(np.all((0 <= player.population) & (player.population <= 10)))
+            self.assertIsInstance(player.strategy, ArrayStrategy)
+
+    def test_run_ga_islands_options(self):
+        auction = make_auction()
+        summary = run_ga(auction=auction, generations=2, population_size=10, islands=3, migration_interval=1,
+                         migrants=1, topology=complete_topology, workers=2, seed=1)
+        self.assertEqual(summary.generations, 2)
+        for unsupported in (dict(checkpoint='checkpoint.npz'), dict(cache=FitnessCache()),
+                            dict(telemetry=Telemetry())):
+            with self.assertRaises(ValueError):
+                run_ga(auction=make_auction(), generations=2, population_size=10, islands=2, **unsupported)
+
+    def test_run_islands_budget(self):
+        summary = run_islands(make_auction(), 100, 10, EvolutionParameters(max_bid=10), islands=2,
+                              migration_interval=1, workers=2, budget=EvolutionBudget(max_evaluations=200))
+        self.assertEqual(summary.stop_reason, 'evaluations')
+        self.assertLess(summary.generations, 100)
+
+    def test_topologies(self):
+        self.assertListEqual(ring_topology(3, 4), [0])
+        self.assertListEqual(ring_topology(0, 1), [])
+        self.assertListEqual(complete_topology(1, 3), [0, 2])
+
+    def test_receive_migrants(self):
+        population = np.arange(8.0).reshape(4, 2)
+        receive_migrants(population, np.array([3.0, 0.0, 2.0, 1.0]), np.full((2, 2), -1.0))
+        np.testing.assert_array_equal(population, [[0, 1], [-1, -1], [4, 5], [-1, -1]])
@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+import time
+from src.StrategyEvolution import *
+from src.LivePlot import *
+from src.Telemetry import Telemetry
+
+
+class TestLivePlot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_buffer_decimates(self):
+        buffer = PlotBuffer(['a', 'b'], capacity=8)
+        for i in range(100):
+            buffer.append(i, dict(a=i, b=-i))
+        x, y = buffer.data()
+        self.assertTrue(4 <= len(x) <= 8)
+        self.assertTrue(np.all(np.diff(x) == np.diff(x)[0]))  # Evenly spread.
+        np.testing.assert_array_equal(y[0], x)
+        np.testing.assert_array_equal(y[1], -x)
+
+    def test_buffer_missing_series(self):
+        buffer = PlotBuffer(['a', 'b'], capacity=8)
+        buffer.append(0, dict(a=1.0))
+        self.assertTrue(np.isnan(buffer.data()[1][1, 0]))
+
+    def test_live_plot_to_file(self):
+        path = os.path.join(self.directory, "fitness.png")
+        with LivePlot(path, interval=0.1) as plot:
+            run_ga(generations=5, population_size=10, telemetry=Telemetry(plot))
+        self.assertGreater(os.path.getsize(path), 0)
+        self.assertEqual(plot.dropped, 0)
+
+    def test_plot_records(self):
+        records = []
+        run_ga(generations=3, population_size=10, telemetry=Telemetry(records.append))
+        path = os.path.join(self.directory, "seconds.svg")
+        plot_records(records, path, series=generation_seconds)
+        with open(path) as svg:
+            self.assertIn('<svg', svg.read())
+
+    def test_plot_records_keeps_backend(self):
+        import matplotlib
+        backend = matplotlib.get_backend()
+        matplotlib.use('pdf')
+        try:
+            plot_records([dict(generation=0, seconds=1.0)], os.path.join(self.directory, "seconds.png"),
+                         series=generation_seconds)
+            self.assertEqual(matplotlib.get_backend(), 'pdf')
+        finally:
+            matplotlib.use(backend)
+
+    def test_close_after_plot_process_died(self):
+        plot = LivePlot(os.path.join(self.directory, "fitness.png"), queue_size=1)
+        plot._process.terminate()
+        plot._process.join()
+        for generation in range(3):
+            plot(dict(generation=generation, players=[dict(player=0, best=1.0)]))
+        start = time.perf_counter()
+        plot.close(timeout=1)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertFalse(plot._process.is_alive())
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+from src.Auction import *
+from src.Market import *
+
+
+class TestMarket(unittest.TestCase):
+
+    def setUp(self):
+        self.market = Market(utilities=np.arange(12.0).reshape(4, 3), capacities=[1, 2, 1],
+                             bids=np.array([[3.0, 1, 2], [1, 5, 4], [7, 0, 1], [2, 2, 8]]))
+
+    def test_players_are_views(self):
+        auction = self.market.to_auction()
+        self.assertEqual(auction.players[1].utilities[self.market.courses[2]], 5.0)
+        self.assertEqual(auction.players[1].utilities[None], 0.0)
+        self.market.utilities[1, 2] = 100.0
+        self.market.bids[0, 0] = 9.0
+        self.assertEqual(auction.players[1].utilities[self.market.courses[2]], 100.0)
+        self.assertEqual(auction.players[0].strategy(auction.courses)[auction.courses[0]], 9.0)
+
+    def test_matrices_round_trip(self):
+        auction = self.market.to_auction()
+        np.testing.assert_array_equal(auction.utility_matrix(), self.market.utilities)
+        np.testing.assert_array_equal(auction.bid_matrix(), self.market.bids)
+        market = Market.from_auction(auction)
+        np.testing.assert_array_equal(market.utilities, self.market.utilities)
+        np.testing.assert_array_equal(market.capacities, self.market.capacities)
+
+    def test_run_auction_through_adapters(self):
+        auction = self.market.to_auction(clearing_function=second_price_clearing_function)
+        res = auction.run_auction()
+        courses = self.market.courses
+        self.assertListEqual(res, [(0.0, courses[1]), (0.0, courses[1]), (3.0, courses[0]), (2.0, courses[2])])
+
+    def test_dict_utilities_still_supported(self):
+        courses = [Course(), Course()]
+        auction = Auction(courses=courses, players=[Player(utilities={courses[0]: 1.0}), Player()])
+        np.testing.assert_array_equal(auction.utility_matrix(), [[1.0, 0.0], [0.0, 0.0]])
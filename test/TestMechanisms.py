@@ -0,0 +1,59 @@
+import unittest
+import random
+import numpy as np
+from src.Auction import *
+from src.Mechanisms import *
+
+
+class TestMechanisms(unittest.TestCase):
+
+    def test_conformance(self):
+        for mechanism in mechanisms():
+            with self.subTest(mechanism=mechanism.name):
+                self.assertListEqual(check_conformance(mechanism, markets=300, seed=1), [])
+
+    def test_harness_detects_differences(self):
+        broken = Mechanism('broken', first_price_clearing_function, batch=second_price_clearing)
+        self.assertGreater(len(check_conformance(broken, markets=50)), 0)
+
+    def test_registry(self):
+        self.assertIs(get_mechanism('second_price').reference, second_price_clearing_function)
+        self.assertEqual(get_mechanism(vectorized_first_price_clearing_function).name, 'first_price')
+        self.assertIs(batch_implementation(all_pay_clearing_function), all_pay_clearing)
+        self.assertIsNone(batch_implementation(lambda bids: []))
+        with self.assertRaises(ValueError):
+            register_mechanism('first_price', first_price_clearing_function)
+        with self.assertRaises(KeyError):
+            get_mechanism('dutch')
+
+    def test_auction_by_mechanism_name(self):
+        auction = Auction(clearing_function='uniform_price')
+        self.assertIs(auction.clearing_function, uniform_price_clearing_function)
+        auction = Auction(clearing_function='vectorized_second_price_clearing_function')
+        self.assertIs(auction.clearing_function, vectorized_second_price_clearing_function)
+
+    def test_names(self):
+        self.assertIs(get_clearing_function('all_pay'), all_pay_clearing_function)
+        self.assertIs(get_clearing_function('first_price_clearing_function'), first_price_clearing_function)
+        self.assertEqual(get_mechanism('vectorized_first_price_clearing_function').name, 'first_price')
+        with self.assertRaises(KeyError):
+            get_clearing_function('dutch')
+
+    def test_uniform_price(self):
+        rng = random.Random(2)
+        for _i in range(100):
+            courses, bids = random_market(rng)
+            bid_matrix = np.array([[b.get(course, np.nan) for course in courses] for b in bids])
+            capacities = np.array([course.capacity for course in courses])
+            uniform_payments, uniform_courses = uniform_price_clearing(bid_matrix, capacities)
+            second_payments, second_courses = second_price_clearing(bid_matrix, capacities)
+            np.testing.assert_array_equal(uniform_courses, second_courses)
+            assigned = uniform_courses != UNASSIGNED
+            winning_bids = bid_matrix[assigned, uniform_courses[assigned]]
+            self.assertTrue(np.all(uniform_payments[assigned] <= winning_bids))
+            self.assertTrue(np.all(uniform_payments >= second_payments))
+
+    def test_all_pay(self):
+        course = Course(capacity=1)
+        assignments = all_pay_clearing_function([{course: 3.0}, {course: 5.0}, {}])
+        self.assertListEqual(assignments, [(3.0, None), (5.0, course), (0, None)])
@@ -0,0 +1,38 @@
+import unittest
+import itertools
+import numpy as np
+from src.Clearing import UNASSIGNED
+from src.OptimalAllocation import *
+
+
+def brute_force_welfare(utilities, capacities):
+    """Best welfare over all allocations, each player taking a course or nothing."""
+    n_players, n_courses = utilities.shape
+    best = 0.0
+    for allocation in itertools.product(range(-1, n_courses), repeat=n_players):
+        taken = np.bincount([c for c in allocation if c >= 0], minlength=n_courses)
+        if np.all(taken <= capacities):
+            best = max(best, sum(utilities[p, c] for p, c in enumerate(allocation) if c >= 0))
+    return best
+
+
+class TestOptimalAllocation(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        for _i in range(150):
+            n_players, n_courses = rng.integers(1, 6), rng.integers(1, 4)
+            utilities = np.round(rng.normal(size=(n_players, n_courses)) * 5)  # Rounded, so there are ties.
+            capacities = rng.integers(0, 3, size=n_courses)
+            course_idx = optimal_allocation(utilities, capacities)
+            assigned = course_idx != UNASSIGNED
+            self.assertTrue(np.all(np.bincount(course_idx[assigned], minlength=n_courses) <= capacities))
+            self.assertAlmostEqual(optimal_welfare(utilities, capacities), brute_force_welfare(utilities, capacities))
+
+    def test_beats_greedy(self):
+        utilities = np.array([[10.0, 9.0], [8.0, 0.0]])
+        np.testing.assert_array_equal(optimal_allocation(utilities, np.array([1, 1])), [1, 0])
+
+    def test_negative_utilities_unassigned(self):
+        utilities = np.array([[-1.0, -2.0], [3.0, -1.0]])
+        np.testing.assert_array_equal(optimal_allocation(utilities, np.array([2, 2])), [UNASSIGNED, 0])
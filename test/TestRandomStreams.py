@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+import src.RandomStreams as RandomStreams
+from src.RandomStreams import *
+from src.Auction import Course, uniform_distribution
+from src.StrategyEvolution import initialize_population, random_population
+
+
+class TestRandomStreams(unittest.TestCase):
+
+    def test_seed_shared_generator(self):
+        RandomStreams.seed(1)
+        first = get_rng().random(3)
+        RandomStreams.seed(1)
+        np.testing.assert_array_equal(first, get_rng().random(3))
+
+    def test_child_streams(self):
+        root = np.random.SeedSequence(2)
+        np.testing.assert_array_equal(child_rng(root, 0, 1).random(3),
+                                      child_rng(np.random.SeedSequence(2), 0, 1).random(3))
+        self.assertFalse(np.array_equal(child_rng(root, 0, 1).random(3), child_rng(root, 1, 0).random(3)))
+
+    def test_uniform_distribution(self):
+        distribution = uniform_distribution(10, 20)
+        draws = distribution.sample(1000, np.random.default_rng(3))
+        self.assertEqual(draws.shape, (1000,))
+        self.assertTrue(np.all((10 <= draws) & (draws < 20)))
+        self.assertTrue(10 <= distribution() < 20)
+
+    def test_sample_popularity(self):
+        bulk = Course().sample_popularity(50, np.random.default_rng(4))
+        self.assertEqual(bulk.shape, (50,))
+        self.assertTrue(np.all((0 <= bulk) & (bulk < 1000)))
+        # Plain callables still work, one draw at a time.
+        np.testing.assert_array_equal(Course(popularity_distribution=lambda: 7.0).sample_popularity(3), [7.0] * 3)
+
+    def test_population(self):
+        population = random_population(6, 4, start_range=10, max_bid=5, rng=np.random.default_rng(5))
+        self.assertEqual(population.shape, (6, 4))
+        self.assertTrue(np.all((0 <= population) & (population <= 5)))
+        self.assertListEqual(initialize_population(6, 4, 10, 5, np.random.default_rng(5)), population.tolist())
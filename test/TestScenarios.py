@@ -0,0 +1,51 @@
+import unittest
+import tempfile
+from src.Scenarios import *
+from src.Auction import second_price_clearing_function
+
+
+class TestScenarios(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_generated_market(self):
+        spec = ScenarioSpec(1000, 30, seats_per_player=0.8, popularity_correlation=0.5, seed=1)
+        market = generate_market(spec)
+        self.assertEqual(market.utilities.shape, (1000, 30))
+        self.assertTrue(np.all((0 < market.utilities) & (market.utilities < 100)))
+        self.assertEqual(market.capacities.sum(), 800)
+        self.assertLessEqual(market.capacities.max() - market.capacities.min(), 1)
+        np.testing.assert_array_equal(market.utilities, generate_market(spec).utilities)
+
+    def test_correlation(self):
+        def rank_agreement(correlation):
+            utilities = generate_utilities(ScenarioSpec(500, 20, popularity_correlation=correlation, seed=2))
+            return np.corrcoef(utilities)[np.triu_indices(500, 1)].mean()
+        self.assertAlmostEqual(rank_agreement(0.0), 0.0, delta=0.05)
+        self.assertGreater(rank_agreement(0.8), 0.5)
+        self.assertAlmostEqual(rank_agreement(1.0), 1.0)
+
+    def test_uneven_capacities(self):
+        capacities = generate_capacities(ScenarioSpec(1000, 30, capacity_concentration=0.5, seed=3))
+        self.assertEqual(capacities.sum(), 1000)
+        self.assertGreater(capacities.max() - capacities.min(), 1)
+
+    def test_scenario_on_disk(self):
+        spec = ScenarioSpec(5000, 10, seed=4)
+        generate_scenario(spec, self.directory)
+        market = load_market(self.directory)
+        self.assertIsInstance(market.utilities.base, np.memmap)
+        np.testing.assert_array_equal(market.utilities, generate_market(spec).utilities)
+        self.assertEqual(load_spec(self.directory), spec)
+        auction = load_auction(self.directory, max_bid=10, clearing_function=second_price_clearing_function)
+        self.assertEqual(len(auction.players), 5000)
+        self.assertIs(auction.utility_row(3), auction.players[3].utilities.row)
+
+    def test_save_market_round_trip(self):
+        market = Market(np.arange(6.0).reshape(3, 2), [1, 1], bids=np.ones((3, 2)))
+        save_market(market, self.directory)
+        loaded = load_market(self.directory, mmap_mode=None)
+        np.testing.assert_array_equal(loaded.utilities, market.utilities)
+        np.testing.assert_array_equal(loaded.bids, market.bids)
+        self.assertIsNone(load_spec(self.directory))
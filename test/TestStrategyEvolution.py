@@ -1,12 +1,65 @@
 import unittest
 import random
 from src.StrategyEvolution import *
+from src.EvolutionBudget import *
+from src.FitnessCache import FitnessCache
 
 
 class TestAuction(unittest.TestCase):
     def test_run_ga(self):
         run_ga(generations=40, population_size=10)
 
+    def test_run_ga_budget(self):
+        summary = run_ga(generations=5, population_size=10)
+        self.assertEqual(summary.generations, 5)
+        self.assertEqual(summary.iterations, 5 * 2)  # One iteration per player and generation.
+        self.assertEqual(summary.evaluations, 5 * 2 * 10)
+        self.assertGreaterEqual(summary.clearings, summary.evaluations)
+        self.assertEqual(summary.stop_reason, 'generations')
+
+        summary = run_ga(generations=100, population_size=10, budget=EvolutionBudget(max_evaluations=60))
+        self.assertEqual(summary.evaluations, 60)
+        self.assertEqual(summary.stop_reason, 'evaluations')
+
+        summary = run_ga(generations=4, population_size=10, budget=EvolutionBudget(schedule=linear_schedule(1)))
+        self.assertEqual(summary.iterations, (0 + 1 + 2 + 3) * 2)
+
+        summary = run_ga(generations=10e3, population_size=10, budget=EvolutionBudget(max_seconds=0.2))
+        self.assertEqual(summary.stop_reason, 'seconds')
+
+    def test_stop_reason_recorded_when_stopping(self):
+        budget = EvolutionBudget(max_seconds=0.0)
+        budget.start()
+        self.assertEqual(budget.summary().stop_reason, 'generations')  # Out of time, but nothing stopped on it.
+        self.assertTrue(budget.exhausted())
+        self.assertEqual(budget.summary().stop_reason, 'seconds')
+
+    def test_run_ga_cache(self):
+        cache = FitnessCache()
+        summary = run_ga(generations=5, population_size=10, cache=cache)
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.misses, summary.evaluations)
+
+    def test_run_ga_fitness_racing(self):
+        def clearings(**racing):
+            courses = [Course(capacity=1), Course(capacity=2)]
+            players = [Player(utilities={courses[0]: u, courses[1]: 10 - u}) for u in [1.0, 4.0, 6.0, 9.0]]
+            auction = Auction(max_bid=10, courses=courses, players=players)
+            # Most genes start at max_bid, so that many bids are tied.
+            return run_ga(auction=auction, generations=5, population_size=20, start_range=100, seed=0,
+                          **racing).clearings
+        self.assertLess(clearings(fitness_racing=True), clearings())
+        self.assertLess(clearings(fitness_racing=True), clearings(fitness_racing=True, racing_min_samples=100))
+
+    def test_run_ga_parallel_reproducible(self):
+        def evolved_bids(workers):
+            courses = [Course(capacity=1), Course(capacity=2)]
+            players = [Player(utilities={courses[0]: u, courses[1]: 10 - u}) for u in [1.0, 4.0, 6.0, 9.0]]
+            auction = Auction(max_bid=10, courses=courses, players=players)
+            run_ga(auction=auction, generations=4, population_size=10, workers=workers, seed=42)
+            return auction.bid_matrix()
+        np.testing.assert_array_equal(evolved_bids(1), evolved_bids(2))
+
     def test_unzip(self):
         l = [(random.random(), random.random()) for _i in range(100)]
         l1, l2 = unzip(l)
@@ -18,6 +71,45 @@ class TestAuction(unittest.TestCase):
         apply_crossover(population, 0.7)
         self.assertEqual(total_length, sum(len(chromosome) for chromosome in population))
 
+    def test_one_point_crossover(self):
+        population = np.arange(40.0).reshape(8, 5)
+        original = population.copy()
+        one_point_crossover(population, 1.0, np.random.default_rng(1))
+        for i in range(0, 8, 2):
+            # Each pair swaps a tail: every position keeps the genes of the pair.
+            np.testing.assert_array_equal(np.sort(population[i:i + 2], axis=0), original[i:i + 2])
+
+    def test_creep_mutation(self):
+        population = np.full((50, 4), 5.0)
+        creep_mutation(population, 1.0, 10.0, 6.0, np.random.default_rng(2))
+        self.assertTrue(np.all((0.0 <= population) & (population <= 6.0)))
+        self.assertFalse(np.all(population == 5.0))
+        unchanged = np.full((50, 4), 5.0)
+        creep_mutation(unchanged, 0.0, 10.0, 6.0, np.random.default_rng(2))
+        np.testing.assert_array_equal(unchanged, 5.0)
+
+    def test_creep_mutation_infinite_gene(self):
+        population = np.full((10, 2), math.inf)
+        creep_mutation(population, 1.0, 0.2, math.inf, np.random.default_rng(2))
+        self.assertFalse(np.any(np.isnan(population)))
+        np.testing.assert_array_equal(population, 0.0)
+
+    def test_tournament_selection(self):
+        population = np.arange(20.0).reshape(10, 2)
+        fitnesses = np.arange(10.0)
+        always_best = tournament_selection(population, fitnesses, 1.0, 10, np.random.default_rng(3))
+        self.assertGreater(always_best[:, 0].mean(), population[:, 0].mean())
+        selected = tournament_selection(population, fitnesses, 0.75, 2, np.random.default_rng(4))
+        np.testing.assert_array_equal(selected, tournament_selection(population, fitnesses, 0.75, 2,
+                                                                     np.random.default_rng(4)))
+        self.assertTrue(all(row.tolist() in population.tolist() for row in selected))
+
+    def test_elitism(self):
+        population = np.zeros((4, 3))
+        elitism(population, np.array([1.0, 2.0, 3.0]), 2)
+        np.testing.assert_array_equal(population[:2], [[1, 2, 3], [1, 2, 3]])
+        np.testing.assert_array_equal(population[2:], 0)
+
     def test_decode_chromosome(self):
         return  # TODO: reimplement
         chromosome = [3, -1, 1]
@@ -0,0 +1,40 @@
+import unittest
+import json
+import os
+import tempfile
+from src.Sweep import *
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.results_path = os.path.join(tempfile.mkdtemp(), "results.jsonl")
+        self.points = sweep_grid(scenarios=['second_price'], max_bids=[10, 1],
+                                 ga_parameters=[dict(generations=3, population_size=4)], seeds=[0, 1])
+
+    def test_grid(self):
+        self.assertEqual(len(self.points), 4)
+        self.assertEqual(len(set(point.key() for point in self.points)), 4)
+
+    def test_default_ga_parameters(self):
+        point = SweepPoint('second_price', 10)
+        self.assertIsNone(point.ga_parameters)
+        self.assertEqual(point.key(), SweepPoint('second_price', 10, ga_parameters={}).key())
+
+    def test_clearing_function_names(self):
+        for name in ['uniform_price', 'second_price_clearing_function']:
+            record = run_point(SweepPoint('first_price', 10, name, dict(generations=1, population_size=4)))
+            self.assertEqual(record['clearing_function'], name)
+
+    def test_run_and_resume(self):
+        first = next(run_sweep(self.points, self.results_path, workers=2))
+        with open(self.results_path, 'a') as results:
+            results.write('{"key": "cut off')  # Interrupted while writing.
+        rest = list(run_sweep(self.points, self.results_path, workers=2))
+        self.assertEqual(len(rest), 3)
+        self.assertNotIn(first['key'], [record['key'] for record in rest])
+        self.assertEqual(list(run_sweep(self.points, self.results_path)), [])
+        with open(self.results_path) as results:
+            records = [json.loads(line) for line in results if line.endswith("\n") and '"cut off' not in line]
+        self.assertSetEqual(set(record['key'] for record in records), set(point.key() for point in self.points))
+        self.assertEqual(len(records[0]['best_strategies']), 3)
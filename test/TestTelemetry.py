@@ -0,0 +1,42 @@
+import unittest
+import json
+import os
+import tempfile
+from src.StrategyEvolution import *
+from src.FitnessCache import FitnessCache
+from src.Telemetry import *
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def test_run_ga_records(self):
+        records = []
+        auction = Auction()
+        summary = run_ga(auction=auction, generations=3, population_size=10, seed=1, cache=FitnessCache(),
+                         telemetry=Telemetry(records.append))
+        self.assertEqual([record['generation'] for record in records], [0, 1, 2])
+        self.assertEqual(sum(record['clearings'] for record in records), summary.clearings)
+        self.assertEqual(sum(record['evaluations'] for record in records), summary.evaluations)
+        for record in records:
+            self.assertSetEqual(set(record['stages']), {'evaluation', 'clearing', 'selection', 'crossover', 'mutation'})
+            self.assertLessEqual(record['stages']['clearing'], record['stages']['evaluation'])
+            self.assertEqual([player['player'] for player in record['players']], list(range(len(auction.players))))
+            for player in record['players']:
+                self.assertGreaterEqual(player['best'], player['mean'])
+            self.assertTrue(0 <= record['cache_hit_rate'] <= 1)
+
+    def test_same_run_without_telemetry(self):
+        def evolved_bids(telemetry):
+            auction = Auction()
+            run_ga(auction=auction, generations=3, population_size=10, seed=2, telemetry=telemetry)
+            return auction.bid_matrix()
+        np.testing.assert_array_equal(evolved_bids(None), evolved_bids(Telemetry()))
+
+    def test_json_lines_logger(self):
+        path = os.path.join(tempfile.mkdtemp(), "telemetry.jsonl")
+        with JsonLinesLogger(path) as logger:
+            run_ga(generations=2, population_size=10, telemetry=Telemetry(logger))
+        with open(path) as lines:
+            records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 2)
+        self.assertNotIn('cache_hit_rate', records[0])